@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the Multi-City Recommendation System
+===================================================
+Builds synthetic catalogues scaled up from the shipped CSVs and measures
+load, training and per-archetype query latency (p50/p95/p99), throughput
+under concurrent clients and peak memory, reported as JSON.
+
+    python benchmark.py                                  # 1x, 10x and 100x
+    python benchmark.py --scales 1 10 --output baseline.json
+    python benchmark.py --scales 1 10 --baseline baseline.json
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import contextlib
+import argparse
+import tempfile
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.base import clone
+from sklearn.preprocessing import normalize
+
+from budget_recommendation_system import MultiCityRecommendationSystem, ResultCache, EMBEDDING_COLUMNS
+from semantic_index import IVFIndex, EmbeddingIndex, recall_at_k
+
+try:
+    import resource
+except ImportError:  # Windows: no max RSS
+    resource = None
+
+MODEL_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# One representative query per archetype
+QUERY_ARCHETYPES = {
+    'budget': 'budget friendly restaurants',
+    'cuisine': 'good south indian food',
+    'city': 'restaurants in koramangala',
+    'premium': 'luxury hotels',
+    'broad': 'good food'
+}
+
+# Skewed production-like mix for the result cache: a few head queries, their
+# paraphrases and a long tail, with weights
+CACHE_TRAFFIC = [
+    ('budget friendly restaurants', 30), ('cheap restaurants', 10), ('affordable restaurant', 5),
+    ('cheap hotels', 20), ('budget hotel', 8),
+    ('biryani in hyderabad', 15), ('hyderabad biryani', 5),
+    ('good south indian food', 3), ('luxury hotels', 2), ('restaurants in koramangala', 1),
+    ('pizza in pune', 1)
+]
+
+def synthetic_catalogues(scale=1, seed=42):
+    """Raw restaurant (Zomato schema) and hotel (OYO schema) frames, scale x the shipped CSVs.
+
+    zomato.csv is not shipped, so restaurants are derived from the Bangalore
+    chain listing with sampled locations and costs.
+    """
+    rng = np.random.default_rng(seed)
+    system = MultiCityRecommendationSystem()
+    areas = [area for info in system.city_data.values() for area in info['popular_areas']]
+
+    chains = pd.read_csv(os.path.join(MODEL_DIR, 'Bangalore restaurant chain.csv'), encoding='utf-8-sig')
+    replica = np.repeat(np.arange(scale), len(chains))
+    chains = chains.loc[np.tile(np.arange(len(chains)), scale)].reset_index(drop=True)
+    n = len(chains)
+    locations = rng.choice(areas, n).astype(object)
+    restaurants = pd.DataFrame({
+        'address': chains['Address'],
+        'name': chains['Name'].where(replica == 0, chains['Name'] + ' #' + replica.astype(str)),
+        'rate': chains['Rating'].astype(str) + '/5',
+        'votes': chains['Review_count'],
+        'location': locations,
+        'rest_type': chains['Sub_Category'],
+        'cuisines': chains['Category'],
+        'approx_cost(for two people)': rng.choice(['150', '300', '450', '600', '800', '1,200', '2,000'], n),
+        'listed_in(city)': locations,
+        'Latitude': chains['Latitude'] + rng.normal(0, 0.01, n),
+        'Longitude': chains['Longitude'] + rng.normal(0, 0.01, n)
+    })
+
+    oyo = pd.read_csv(os.path.join(MODEL_DIR, 'oyobanglore.csv'))
+    replica = np.repeat(np.arange(scale), len(oyo))
+    hotels = oyo.loc[np.tile(np.arange(len(oyo)), scale)].reset_index(drop=True)
+    hotels['name'] = hotels['name'].where(replica == 0, hotels['name'] + ' #' + replica.astype(str))
+
+    return restaurants, hotels
+
+def write_synthetic_csvs(data_dir, scale):
+    """Write scale x synthetic CSVs into data_dir; returns matching data_paths"""
+    restaurants, hotels = synthetic_catalogues(scale)
+    data_paths = {
+        'restaurant': os.path.join(data_dir, 'zomato.csv'),
+        'hotel': os.path.join(data_dir, 'oyobanglore.csv')
+    }
+    restaurants.to_csv(data_paths['restaurant'], index=False)
+    hotels.to_csv(data_paths['hotel'], index=False)
+    return data_paths
+
+def build_system(data_dir, scale, train=True):
+    """Write scale x synthetic CSVs into data_dir and load a system from them"""
+    system = MultiCityRecommendationSystem(data_paths=write_synthetic_csvs(data_dir, scale), result_cache_size=0)
+    system.load_and_preprocess_data()
+    if train:
+        system.train_models()
+    return system
+
+def timed(fn, *args, **kwargs):
+    """Wall time of one call in milliseconds"""
+    start = time.perf_counter()
+    fn(*args, **kwargs)
+    return (time.perf_counter() - start) * 1000
+
+def traced_peak(fn, *args, **kwargs):
+    """Peak bytes traced by tracemalloc during one call"""
+    tracemalloc.start()
+    try:
+        fn(*args, **kwargs)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def latency_summary(samples_ms):
+    """p50/p95/p99 and mean of latency samples in milliseconds"""
+    samples = np.asarray(samples_ms, dtype=float)
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+    return {
+        'p50_ms': round(float(p50), 3),
+        'p95_ms': round(float(p95), 3),
+        'p99_ms': round(float(p99), 3),
+        'mean_ms': round(float(samples.mean()), 3),
+        'samples': len(samples)
+    }
+
+def max_rss_bytes():
+    """Peak resident set size of this process so far"""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == 'darwin' else rss * 1024  # Linux reports KiB
+
+def measure_query_memory(system, queries=QUERY_ARCHETYPES, num_recommendations=10):
+    """Peak bytes traced by tracemalloc while answering each query once"""
+    results = {}
+    for archetype, query in queries.items():
+        system.get_recommendations(query, num_recommendations)  # warm parser and index caches
+        results[archetype] = traced_peak(system.get_recommendations, query, num_recommendations)
+    return results
+
+def benchmark_load(data_paths, repeats, catalogue_cache=False):
+    """Latency and peak memory of load_and_preprocess_data; returns the loaded system too.
+
+    With catalogue_cache the columnar cache is built first, so the timed loads map it
+    instead of parsing the CSVs.
+    """
+    if catalogue_cache:
+        MultiCityRecommendationSystem(data_paths=data_paths).load_and_preprocess_data()
+
+    samples = []
+    for _ in range(repeats):
+        system = MultiCityRecommendationSystem(data_paths=data_paths, catalogue_cache=catalogue_cache, result_cache_size=0)
+        samples.append(timed(system.load_and_preprocess_data))
+
+    # Traced separately: tracemalloc slows allocation-heavy code
+    system = MultiCityRecommendationSystem(data_paths=data_paths, catalogue_cache=catalogue_cache, result_cache_size=0)
+    peak = traced_peak(system.load_and_preprocess_data)
+    return system, dict(latency_summary(samples), peak_bytes=peak)
+
+def benchmark_train(system, repeats):
+    """Latency and peak memory of train_models, with the last training report"""
+    samples = [timed(system.train_models) for _ in range(repeats)]
+    peak = traced_peak(system.train_models)
+    return dict(latency_summary(samples), peak_bytes=peak, report=system.training_report)
+
+def benchmark_queries(system, iterations, num_recommendations=10):
+    """Per-archetype latency and peak memory of get_recommendations"""
+    peaks = measure_query_memory(system, num_recommendations=num_recommendations)
+    results = {}
+    for archetype, query in QUERY_ARCHETYPES.items():
+        samples = [timed(system.get_recommendations, query, num_recommendations) for _ in range(iterations)]
+        results[archetype] = dict(latency_summary(samples), query=query, peak_bytes=peaks[archetype])
+    return results
+
+def benchmark_throughput(system, clients, requests, num_recommendations=10):
+    """Requests per second with concurrent clients sharing one system, and via the batch API"""
+    queries = list(QUERY_ARCHETYPES.values())
+    mix = [queries[i % len(queries)] for i in range(requests)]
+
+    results = {}
+    for client_count in clients:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=client_count) as executor:
+            samples = list(executor.map(lambda query: timed(system.get_recommendations, query, num_recommendations), mix))
+        elapsed = time.perf_counter() - start
+        results[f"{client_count}_clients"] = dict(latency_summary(samples), rps=round(requests / elapsed, 1))
+
+    elapsed_ms = timed(system.get_recommendations_batch, mix, num_recommendations)
+    results['batch'] = {'rps': round(requests * 1000 / elapsed_ms, 1), 'samples': requests}
+    return results
+
+def benchmark_result_cache(system, requests, num_recommendations=10, seed=42):
+    """Latency and hit rate of get_recommendations behind a fresh result cache on CACHE_TRAFFIC.
+
+    The system's own cache (off in these benchmarks, so the others time ranking) is restored after.
+    """
+    queries, weights = zip(*CACHE_TRAFFIC)
+    rng = np.random.default_rng(seed)
+    mix = rng.choice(queries, size=requests, p=np.array(weights) / sum(weights))
+
+    previous, system.result_cache = system.result_cache, ResultCache()
+    try:
+        samples = [timed(system.get_recommendations, query, num_recommendations) for query in mix]
+        return dict(latency_summary(samples), **system.result_cache.stats())
+    finally:
+        system.result_cache = previous
+
+def benchmark_ann(index, queries, k, nprobes=(1, 4, 8, 16)):
+    """Recall@k and latency of IVFIndex.search at several nprobe values vs brute force"""
+    report = {
+        'vectors': index.size,
+        'lists': index.n_lists,
+        'k': k,
+        'exact': latency_summary([timed(index.exact_search, query, k) for query in queries])
+    }
+    for nprobe in nprobes:
+        if nprobe > index.n_lists:
+            break
+        report[f"nprobe_{nprobe}"] = dict(
+            latency_summary([timed(index.search, query, k, nprobe) for query in queries]),
+            recall=round(recall_at_k(index, queries, k, nprobe), 4)
+        )
+    return report
+
+def benchmark_catalogue_ann(system, k, num_queries=200, seed=0):
+    """benchmark_ann over each catalogue's embedding index, queried with perturbed listing vectors"""
+    rng = np.random.default_rng(seed)
+    results = {}
+    for kind, df in (('restaurant', system.restaurant_data), ('hotel', system.hotel_data)):
+        if df is None:
+            continue
+        index = EmbeddingIndex(clone(system.vectorizer), system._combine_text_columns(df, EMBEDDING_COLUMNS[kind]))
+        if index.ann is None:
+            continue
+        picks = index.ann.vectors[rng.integers(0, index.ann.size, num_queries)]
+        queries = normalize(picks + rng.normal(0, 0.1, picks.shape)).astype(np.float32)
+        results[kind] = benchmark_ann(index.ann, queries, k)
+    return results
+
+def synthetic_vectors(n, dimensions=64, clusters=256, seed=0):
+    """n unit vectors drawn around random cluster centres, a stand-in for large embedding sets"""
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(clusters, dimensions))
+    vectors = centres[rng.integers(0, clusters, n)] + rng.normal(0, 0.5, (n, dimensions))
+    return normalize(vectors).astype(np.float32)
+
+def run_scale(scale, args):
+    """All benchmarks for one dataset scale"""
+    with tempfile.TemporaryDirectory() as data_dir:
+        data_paths = write_synthetic_csvs(data_dir, scale)
+        system, load = benchmark_load(data_paths, args.repeats)
+        _, load_cached = benchmark_load(data_paths, args.repeats, catalogue_cache=True)
+
+    frames = [df for df in (system.restaurant_data, system.hotel_data) if df is not None]
+    report = {
+        'restaurants': len(system.restaurant_data) if system.restaurant_data is not None else 0,
+        'hotels': len(system.hotel_data) if system.hotel_data is not None else 0,
+        'catalogue_bytes': int(sum(df.memory_usage(deep=True).sum() for df in frames)),
+        'load': load,
+        'load_cached': load_cached,
+        'catalogue_memory': system.catalogue_memory_report()
+    }
+    if not args.skip_train:
+        report['train'] = benchmark_train(system, args.repeats)
+    report['query'] = benchmark_queries(system, args.iterations)
+    report['throughput'] = benchmark_throughput(system, args.clients, args.requests)
+    report['result_cache'] = benchmark_result_cache(system, args.requests)
+    report['ann'] = benchmark_catalogue_ann(system, args.ann_k)
+    report['max_rss_bytes'] = max_rss_bytes()
+    return report
+
+def compare(report, baseline):
+    """Print p50 latency against an earlier report; ratio < 1 is faster"""
+    print(f"{'benchmark':<32}{'baseline p50':>14}{'p50':>12}{'ratio':>8}")
+    for scale, current in report['scales'].items():
+        previous = baseline.get('scales', {}).get(scale)
+        if previous is None:
+            continue
+        rows = [('load', current.get('load'), previous.get('load')),
+                ('load_cached', current.get('load_cached'), previous.get('load_cached')),
+                ('train', current.get('train'), previous.get('train')),
+                ('result_cache', current.get('result_cache'), previous.get('result_cache'))]
+        rows += [(f"query.{archetype}", stats, previous.get('query', {}).get(archetype))
+                 for archetype, stats in current['query'].items()]
+        for name, now, before in rows:
+            if now and before and before['p50_ms']:
+                print(f"{scale + ' ' + name:<32}{before['p50_ms']:>14.2f}{now['p50_ms']:>12.2f}"
+                      f"{now['p50_ms'] / before['p50_ms']:>8.2f}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100],
+                        help='Catalogue sizes as multiples of the shipped CSVs')
+    parser.add_argument('--repeats', type=int, default=3, help='Load and train runs per scale')
+    parser.add_argument('--iterations', type=int, default=200, help='Runs of each query archetype')
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 4, 16], help='Concurrent client counts')
+    parser.add_argument('--requests', type=int, default=500, help='Requests per throughput run')
+    parser.add_argument('--ann-k', type=int, default=10, help='K for the recall@K benchmark of the embedding index')
+    parser.add_argument('--ann-vectors', type=int, default=1_000_000,
+                        help='Size of the synthetic vector set for the ANN benchmark (0 to skip)')
+    parser.add_argument('--skip-train', action='store_true', help='Skip the train_models benchmark')
+    parser.add_argument('--output', help='Write the JSON report here instead of stdout')
+    parser.add_argument('--baseline', help='Earlier JSON report to compare p50 latency against')
+    args = parser.parse_args(argv)
+
+    report = {
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'sklearn': sklearn.__version__,
+            'cpus': os.cpu_count(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S')
+        },
+        'scales': {}
+    }
+    # Keep the system's progress output out of the JSON on stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        for scale in args.scales:
+            report['scales'][f"{scale}x"] = run_scale(scale, args)
+        if args.ann_vectors:
+            vectors = synthetic_vectors(args.ann_vectors + 200)
+            index = IVFIndex(vectors[200:])
+            report['ann_synthetic'] = benchmark_ann(index, vectors[:200], args.ann_k)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(report, json.load(f))
+
+if __name__ == "__main__":
+    main()
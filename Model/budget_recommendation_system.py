@@ -1,4 +1,3 @@
-<<<<<<< HEAD
 #!/usr/bin/env python3
 """
 Multi-City Budget Recommendation System
@@ -10,722 +9,712 @@ based on user queries, location, and preferences using real data.
 import pandas as pd
 import numpy as np
 import re
+import os
+import copy
+import json
+import pickle
+import gzip
+import hashlib
+import functools
+import time
+import threading
+import weakref
+from collections import OrderedDict
+import sklearn
+from concurrent.futures import ThreadPoolExecutor
+from scipy import sparse
+from sklearn.base import clone
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import LabelEncoder, StandardScaler
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
+from sklearn.neighbors import BallTree
+from pandas.api.types import union_categoricals
+from data_parsing import parse_rating, parse_cost, parse_total_price
+from semantic_index import EmbeddingIndex
+from model_compaction import (ACCURACY_TOLERANCE, BudgetLookupTable, compact_forest, distill_boosting,
+                              pickled_size)
 import warnings
 warnings.filterwarnings('ignore')
 
-class MultiCityRecommendationSystem:
-    def __init__(self):
-        self.restaurant_data = None
-        self.hotel_data = None
-        self.restaurant_model = None
-        self.hotel_model = None
-        self.vectorizer = TfidfVectorizer(max_features=100, stop_words='english')
-        self.scaler = StandardScaler()
-        self.city_data = self._initialize_city_data()
-        
-    def _initialize_city_data(self):
-        """Initialize city-specific knowledge base"""
-        return {
-            'bangalore': {
-                'popular_areas': ['koramangala', 'indiranagar', 'whitefield', 'marathahalli', 'btm', 'jayanagar', 'rajajinagar', 'malleshwaram', 'banashankari', 'basavanagudi'],
-                'cuisine_specialty': ['south indian', 'karnataka', 'udupi', 'mangalorean'],
-                'budget_threshold_restaurant': 500,
-                'budget_threshold_hotel': 2000,
-                'known_chains': ['mtr', 'ctr', 'vidyarthi bhavan', 'brahmins coffee bar']
-            },
-            'mumbai': {
-                'popular_areas': ['bandra', 'andheri', 'juhu', 'powai', 'thane', 'navi mumbai', 'colaba', 'byculla'],
-                'cuisine_specialty': ['maharashtrian', 'street food', 'vada pav', 'pav bhaji'],
-                'budget_threshold_restaurant': 600,
-                'budget_threshold_hotel': 3000,
-                'known_chains': ['gokul', 'hotel ram ashraya', 'trishna']
-            },
-            'delhi': {
-                'popular_areas': ['cp', 'karol bagh', 'lajpat nagar', 'saket', 'gurgaon', 'noida', 'dwarka'],
-                'cuisine_specialty': ['north indian', 'mughlai', 'street food', 'paranthe'],
-                'budget_threshold_restaurant': 700,
-                'budget_threshold_hotel': 2500,
-                'known_chains': ['karim', 'al jawahar', 'paranthe wali gali']
-            },
-            'chennai': {
-                'popular_areas': ['t nagar', 'anna nagar', 'adyar', 'velachery', 'omr', 'ecr'],
-                'cuisine_specialty': ['tamil', 'chettinad', 'filter coffee', 'idli dosa'],
-                'budget_threshold_restaurant': 400,
-                'budget_threshold_hotel': 1800,
-                'known_chains': ['saravana bhavan', 'murugan idli shop', 'adyar ananda bhavan']
-            },
-            'pune': {
-                'popular_areas': ['koregaon park', 'camp', 'shivaji nagar', 'kothrud', 'aundh', 'viman nagar'],
-                'cuisine_specialty': ['maharashtrian', 'misal pav', 'vada pav'],
-                'budget_threshold_restaurant': 500,
-                'budget_threshold_hotel': 2000,
-                'known_chains': ['bedekar misal', 'chitale bandhu']
-            },
-            'hyderabad': {
-                'popular_areas': ['hitech city', 'gachibowli', 'jubilee hills', 'banjara hills', 'secunderabad'],
-                'cuisine_specialty': ['hyderabadi', 'biryani', 'haleem', 'kebabs'],
-                'budget_threshold_restaurant': 450,
-                'budget_threshold_hotel': 1900,
-                'known_chains': ['paradise', 'bawarchi', 'shah ghouse']
-            }
-        }
-        
-    def detect_city_from_query(self, query):
-        """Detect city from user query"""
-        query = query.lower()
-        
-        for city in self.city_data.keys():
-            if city in query:
-                return city
-                
-            # Check for popular areas
-            for area in self.city_data[city]['popular_areas']:
-                if area in query:
-                    return city
-        
-        # Default to bangalore as dataset is primarily bangalore
-        return 'bangalore'
-        
-    def extract_preferences(self, query):
-        """Extract user preferences from query"""
-        query = query.lower()
-        preferences = {
-            'budget_only': False,
-            'cuisine': [],
-            'meal_type': [],
-            'rating_min': 0,
-            'show_premium': False
-        }
-        
-        # Budget indicators
-        budget_keywords = ['budget', 'cheap', 'affordable', 'low cost', 'economical']
-        preferences['budget_only'] = any(keyword in query for keyword in budget_keywords)
-        
-        # Premium indicators
-        premium_keywords = ['premium', 'luxury', 'high end', 'expensive', 'fine dining', 'best']
-        preferences['show_premium'] = any(keyword in query for keyword in premium_keywords)
-        
-        # Cuisine preferences
-        cuisine_keywords = {
-            'south indian': ['south indian', 'dosa', 'idli', 'sambar', 'udupi'],
-            'north indian': ['north indian', 'roti', 'naan', 'punjabi', 'dal'],
-            'chinese': ['chinese', 'noodles', 'fried rice', 'manchurian'],
-            'italian': ['italian', 'pizza', 'pasta', 'continental'],
-            'fast food': ['fast food', 'burger', 'sandwich'],
-            'biryani': ['biryani', 'dum biryani', 'chicken biryani'],
-            'street food': ['street food', 'chaat', 'pani puri']
-        }
-        
-        for cuisine, keywords in cuisine_keywords.items():
-            if any(keyword in query for keyword in keywords):
-                preferences['cuisine'].append(cuisine)
-        
-        # Meal type
-        meal_keywords = {
-            'breakfast': ['breakfast', 'morning'],
-            'lunch': ['lunch', 'afternoon'],
-            'dinner': ['dinner', 'evening'],
-            'snacks': ['snacks', 'evening snacks']
-        }
-        
-        for meal, keywords in meal_keywords.items():
-            if any(keyword in query for keyword in keywords):
-                preferences['meal_type'].append(meal)
-        
-        # Rating preferences
-        if 'highly rated' in query or 'top rated' in query or 'best rated' in query:
-            preferences['rating_min'] = 4.0
-        elif 'good' in query:
-            preferences['rating_min'] = 3.5
-            
-        return preferences
-    
-    def _detect_restaurant_city(self, row):
-        """Detect city for a restaurant row"""
-        location = str(row.get('location', '')).lower()
-        address = str(row.get('address', '')).lower()
-        city_listed = str(row.get('listed_in(city)', '')).lower()
-        
-        combined_text = f"{location} {address} {city_listed}"
-        
-        for city in self.city_data.keys():
-            if city in combined_text:
-                return city
-            for area in self.city_data[city]['popular_areas']:
-                if area in combined_text:
-                    return city
-        
-        return 'bangalore'  # Default
-    
-    def _detect_hotel_city(self, row):
-        """Detect city for a hotel row"""
-        location = str(row.get('location', '')).lower()
-        
-        for city in self.city_data.keys():
-            if city in location:
-                return city
-            for area in self.city_data[city]['popular_areas']:
-                if area in location:
-                    return city
-        
-        return 'bangalore'  # Default
-    
-    def _classify_restaurant_budget(self, row):
-        """Classify restaurant as budget friendly based on city"""
-        city = row['detected_city']
-        cost = row['numeric_cost']
-        threshold = self.city_data[city]['budget_threshold_restaurant']
-        return 1 if cost <= threshold else 0
-    
-    def _classify_hotel_budget(self, row):
-        """Classify hotel as budget friendly based on city"""
-        city = row['detected_city']
-        price = row['numeric_price']
-        threshold = self.city_data[city]['budget_threshold_hotel']
-        return 1 if price <= threshold else 0
-    def load_and_preprocess_data(self):
-        """Load and preprocess restaurant and hotel data"""
-        print("Loading and preprocessing data...")
-        
-        # Load restaurant data (Zomato)
-        try:
-            self.restaurant_data = pd.read_csv('zomato.csv')
-            self.restaurant_data = self._clean_restaurant_data(self.restaurant_data)
-        except Exception as e:
-            print(f"Error loading restaurant data: {e}")
-            
-        # Load hotel data (OYO)
-        try:
-            self.hotel_data = pd.read_csv('oyobanglore.csv')
-            self.hotel_data = self._clean_hotel_data(self.hotel_data)
-        except Exception as e:
-            print(f"Error loading hotel data: {e}")
-            
-        print("Data preprocessing completed!")
-        
-    def _clean_restaurant_data(self, df):
-        """Clean and preprocess restaurant data"""
-        # Clean rate column
-        df['rate'] = df['rate'].astype(str)
-        df['numeric_rate'] = df['rate'].apply(self._extract_rating)
-        
-        # Clean cost column
-        df['cost'] = df['approx_cost(for two people)'].astype(str)
-        df['numeric_cost'] = df['cost'].apply(self._extract_cost)
-        
-        # Detect city for each restaurant and create budget category
-        df['detected_city'] = df.apply(self._detect_restaurant_city, axis=1)
-        df['is_budget_friendly'] = df.apply(self._classify_restaurant_budget, axis=1)
-        
-        # Clean text fields
-        df['cuisines'] = df['cuisines'].fillna('')
-        df['location'] = df['location'].fillna('')
-        df['rest_type'] = df['rest_type'].fillna('')
-        
-        # Create combined text features
-        df['combined_features'] = (df['cuisines'] + ' ' + 
-                                 df['location'] + ' ' + 
-                                 df['rest_type']).str.lower()
-        
-        # Remove rows with invalid data
-        df = df.dropna(subset=['numeric_rate', 'numeric_cost'])
-        df = df[df['numeric_cost'] > 0]
-        
-        return df
-        
-    def _clean_hotel_data(self, df):
-        """Clean and preprocess hotel data"""
-        # Clean price column
-        df['numeric_price'] = df['price'].apply(self._extract_cost)
-        
-        # Clean ratings
-        df['numeric_rating'] = df['ratings'].apply(self._extract_rating)
-        
-        # Detect city for each hotel and create budget category
-        df['detected_city'] = df.apply(self._detect_hotel_city, axis=1)
-        df['is_budget_friendly'] = df.apply(self._classify_hotel_budget, axis=1)
-        
-        # Clean text fields
-        df['location'] = df['location'].fillna('')
-        df['condition'] = df['condition'].fillna('')
-        
-        # Combine features
-        features = []
-        for col in ['feature1', 'feature2', 'feature3']:
-            if col in df.columns:
-                df[col] = df[col].fillna('')
-                features.append(df[col])
-        
-        df['combined_features'] = (df['location'] + ' ' + 
-                                 df['condition'] + ' ' + 
-                                 ' '.join(features)).str.lower()
-        
-        # Remove rows with invalid data
-        df = df.dropna(subset=['numeric_price', 'numeric_rating'])
-        df = df[df['numeric_price'] > 0]
-        
-        return df
-        
-    def _extract_rating(self, rating_str):
-        """Extract numeric rating from string"""
-        if pd.isna(rating_str) or rating_str == 'nan':
-            return 3.0  # Default rating
-        
-        rating_str = str(rating_str).strip()
-        
-        # Extract number from rating string (e.g., "4.1/5" -> 4.1)
-        match = re.search(r'(\d+\.?\d*)', rating_str)
-        if match:
-            rating = float(match.group(1))
-            # Normalize to 5-point scale if needed
-            if rating > 5:
-                rating = rating / 2  # Assume 10-point scale
-            return min(max(rating, 0), 5)
-        
-        return 3.0  # Default rating
-        
-    def _extract_cost(self, cost_str):
-        """Extract numeric cost from string"""
-        if pd.isna(cost_str) or cost_str == 'nan':
-            return 0
-        
-        cost_str = str(cost_str).strip()
-        
-        # Remove commas and extract numbers
-        cost_str = cost_str.replace(',', '')
-        match = re.search(r'(\d+)', cost_str)
-        if match:
-            return int(match.group(1))
-        
-        return 0
-        
-    def train_models(self):
-        """Train ML models for budget classification"""
-        print("Training ML models...")
-        
-        if self.restaurant_data is not None and len(self.restaurant_data) > 0:
-            self._train_restaurant_model()
-            
-        if self.hotel_data is not None and len(self.hotel_data) > 0:
-            self._train_hotel_model()
-            
-        print("Model training completed!")
-        
-    def _train_restaurant_model(self):
-        """Train restaurant budget classification model"""
-        df = self.restaurant_data.copy()
-        
-        # Prepare features
-        X = pd.DataFrame()
-        X['rating'] = df['numeric_rate']
-        X['cost'] = df['numeric_cost']
-        X['votes'] = pd.to_numeric(df['votes'], errors='coerce').fillna(0)
-        
-        # Encode categorical features
-        le_location = LabelEncoder()
-        le_type = LabelEncoder()
-        
-        X['location_encoded'] = le_location.fit_transform(df['location'].astype(str))
-        X['type_encoded'] = le_type.fit_transform(df['rest_type'].astype(str))
-        
-        y = df['is_budget_friendly']
-        
-        # Train model
-        if len(X) > 10:  # Ensure we have enough data
-            X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-            
-            self.restaurant_model = RandomForestClassifier(n_estimators=100, random_state=42)
-            self.restaurant_model.fit(X_train, y_train)
-            
-            # Store encoders for future use
-            self.restaurant_le_location = le_location
-            self.restaurant_le_type = le_type
-            
-            print(f"Restaurant model accuracy: {self.restaurant_model.score(X_test, y_test):.3f}")
-        
-    def _train_hotel_model(self):
-        """Train hotel budget classification model"""
-        df = self.hotel_data.copy()
-        
-        # Prepare features
-        X = pd.DataFrame()
-        X['rating'] = df['numeric_rating']
-        X['price'] = df['numeric_price']
-        X['stars'] = pd.to_numeric(df['stars'], errors='coerce').fillna(3)
-        
-        # Encode location
-        le_location = LabelEncoder()
-        X['location_encoded'] = le_location.fit_transform(df['location'].astype(str))
-        
-        y = df['is_budget_friendly']
-        
-        # Train model
-        if len(X) > 10:  # Ensure we have enough data
-            X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-            
-            self.hotel_model = RandomForestClassifier(n_estimators=100, random_state=42)
-            self.hotel_model.fit(X_train, y_train)
-            
-            # Store encoder for future use
-            self.hotel_le_location = le_location
-            
-            print(f"Hotel model accuracy: {self.hotel_model.score(X_test, y_test):.3f}")
+try:
+    import pyarrow as pa
+except ImportError:  # No columnar cache: cleaned catalogues are rebuilt from CSV
+    pa = None
+
+# Bump whenever the cleaned frame layout or the fitted model features change,
+# so snapshots written by older code are rebuilt instead of loaded.
+SNAPSHOT_VERSION = 9
+DEFAULT_SNAPSHOT_PATH = 'recommender_snapshot.pkl'
+
+EARTH_RADIUS_KM = 6371.0
+DEFAULT_SEARCH_RADIUS_KM = 5.0
+DISTANCE_PENALTY_PER_KM = 0.2  # Score lost per km from the user in location queries
+TEXT_MATCH_WEIGHT = 1.0  # Score added at full TF-IDF similarity between query and listing
+
+# Random forest size. With select_trees, forests grow TREE_STEP trees at a time
+# from MIN_TREES until the out-of-bag accuracy gains less than OOB_PLATEAU.
+DEFAULT_TREES = 100
+MIN_TREES = 25
+MAX_TREES = 300
+TREE_STEP = 25
+OOB_PLATEAU = 0.001
+
+DEFAULT_RESULT_CACHE_SIZE = 1024  # Ranked results kept per system; 0 disables the cache
+DEFAULT_RESULT_CACHE_TTL = 300.0  # Seconds a cached result is served; None keeps it until evicted
+RETRAIN_FRACTION = 0.1  # Share of a catalogue upserted or removed before the models retrain in the background
+
+COMPACTION_METHODS = ('forest', 'boosting', 'lookup')
+# Cost column and bucket width of each catalogue's BudgetLookupTable; every
+# city's budget threshold is a multiple of the width
+LOOKUP_COSTS = {'restaurant': ('numeric_cost', 50), 'hotel': ('numeric_price', 100)}
+
+# Listing description columns embedded for semantic candidate generation; for the
+# Bangalore chain listing these are its Category and Sub_Category (see 'aliases')
+EMBEDDING_COLUMNS = {
+    'restaurant': ['cuisines', 'rest_type'],
+    'hotel': ['condition', 'feature1', 'feature2', 'feature3']
+}
+
+MODEL_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CHUNKSIZE = 100_000  # CSV rows read and cleaned at a time
+# Default restaurant feed: the full Zomato export when present, else the shipped chain listing
+DEFAULT_RESTAURANT_FEEDS = ('zomato.csv', 'Bangalore restaurant chain.csv')
+
+# Declared schema of each source feed. Only 'columns' are read, all as text, so
+# a malformed cell can neither fail a chunk nor change a column's type from one
+# chunk to the next; cleaning parses them, and every cleaned chunk is stored
+# with 'dtypes' (duplicate-heavy text as categoricals, compact numerics).
+# Restaurants repeat once per listed_in category, so their names, addresses and
+# cuisines are dictionary-encoded too; hotel names and descriptions are nearly
+# unique and stay plain strings. 'aliases' map other exports' headers onto the
+# feed columns, e.g. the shipped Bangalore chain listing (which has coordinates
+# but no cost, location or listed_in columns).
+RESTAURANT_SCHEMA = {
+    'columns': ['name', 'address', 'rate', 'votes', 'location', 'rest_type', 'cuisines',
+                'approx_cost(for two people)', 'listed_in(city)', 'Latitude', 'Longitude'],
+    'aliases': {'Name': 'name', 'Rating': 'rate', 'Review_count': 'votes', 'Category': 'cuisines',
+                'Sub_Category': 'rest_type', 'Address': 'address'},
+    'dtypes': {'name': 'category', 'address': 'category', 'rate': 'category', 'location': 'category',
+               'rest_type': 'category', 'cuisines': 'category', 'approx_cost(for two people)': 'category',
+               'listed_in(city)': 'category', 'cost': 'category', 'combined_features': 'category',
+               'detected_city': 'category', 'is_budget_friendly': 'int8', 'numeric_cost': 'float32',
+               'votes': 'float32'}
+}
+HOTEL_SCHEMA = {
+    'columns': ['name', 'location', 'price', 'taxes', 'stars', 'ratings', 'condition',
+                'feature1', 'feature2', 'feature3'],
+    'dtypes': {'location': 'category', 'condition': 'category', 'feature1': 'category',
+               'feature2': 'category', 'feature3': 'category', 'detected_city': 'category',
+               'is_budget_friendly': 'int8', 'numeric_price': 'int32', 'total_price': 'int32'}
+}
+
+def file_sha256(path):
+    """SHA-256 hex digest of a file, read in 1 MB blocks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def catalogue_cache_path(source_path):
+    """Columnar cache of the cleaned catalogue built from source_path, kept beside it"""
+    return f"{os.path.splitext(source_path)[0]}.catalogue.arrow"
+
+def register_after_fork(obj):
+    """Call obj._after_fork() in the child of every later fork, for as long as obj lives.
     
-    def get_recommendations(self, user_query, num_recommendations=10):
-        """Get recommendations based on user query with city and preference support"""
-        user_query = user_query.lower().strip()
-        
-        # Detect city and extract preferences
-        detected_city = self.detect_city_from_query(user_query)
-        preferences = self.extract_preferences(user_query)
-        
-        # Determine if user wants restaurants or hotels
-        restaurant_keywords = ['restaurant', 'food', 'eat', 'dining', 'cuisine', 'meal', 'lunch', 'dinner', 'breakfast']
-        hotel_keywords = ['hotel', 'stay', 'accommodation', 'room', 'lodge', 'guest', 'night']
-        
-        wants_restaurants = any(keyword in user_query for keyword in restaurant_keywords)
-        wants_hotels = any(keyword in user_query for keyword in hotel_keywords)
-        
-        # If neither specified, provide both
-        if not wants_restaurants and not wants_hotels:
-            wants_restaurants = wants_hotels = True
-            
-        recommendations = []
-        
-        if wants_restaurants and self.restaurant_data is not None:
-            restaurant_recs = self._get_restaurant_recommendations(user_query, detected_city, preferences, num_recommendations//2 if wants_hotels else num_recommendations)
-            recommendations.extend(restaurant_recs)
-            
-        if wants_hotels and self.hotel_data is not None:
-            hotel_recs = self._get_hotel_recommendations(user_query, detected_city, preferences, num_recommendations//2 if wants_restaurants else num_recommendations)
-            recommendations.extend(hotel_recs)
-            
-        return recommendations, detected_city, preferences
-        
-    def _get_restaurant_recommendations(self, query, detected_city, preferences, num_recs):
-        """Get restaurant recommendations based on city and preferences"""
-        df = self.restaurant_data.copy()
-        
-        # Filter by city if specific city detected
-        if detected_city != 'bangalore' or any(city in query for city in self.city_data.keys()):
-            df = df[df['detected_city'] == detected_city]
-        
-        # Apply budget filter based on preferences
-        if preferences['budget_only']:
-            df = df[df['is_budget_friendly'] == 1]
-        elif not preferences['show_premium']:
-            # Show both budget and mid-range, but prioritize budget
-            pass
-        
-        # Filter by rating if specified
-        if preferences['rating_min'] > 0:
-            df = df[df['numeric_rate'] >= preferences['rating_min']]
-        
-        # Filter by cuisine preferences
-        if preferences['cuisine']:
-            cuisine_filter = df['cuisines'].str.lower().str.contains('|'.join(preferences['cuisine']), na=False, case=False)
-            df = df[cuisine_filter]
-        
-        if len(df) == 0:
-            return []
-        
-        # Create scoring based on preferences and city
-        df = df.copy()
-        df['score'] = self._calculate_restaurant_score(df, preferences, detected_city)
-        
-        # Remove duplicates based on restaurant name and get diverse recommendations
-        df = self._get_diverse_restaurants(df, num_recs)
-        
-        recommendations = []
-        for _, row in df.iterrows():
-            rec = {
-                'type': 'Restaurant',
-                'name': row['name'],
-                'location': row['location'],
-                'city': row['detected_city'].title(),
-                'rating': f"{row['numeric_rate']}/5",
-                'cost': f"Rs {row['numeric_cost']} for two",
-                'cuisine': row['cuisines'],
-                'budget_friendly': bool(row['is_budget_friendly'])
-            }
-            recommendations.append(rec)
-            
-        return recommendations
+    Only the forking thread survives a fork, so a lock another thread held at
+    that moment would stay held in the child forever; _after_fork replaces
+    such locks. obj is only weakly referenced, so it is still freed as usual.
+    """
+    if not hasattr(os, 'register_at_fork'):  # No fork on Windows
+        return
+    ref = weakref.ref(obj)
     
-    def _calculate_restaurant_score(self, df, preferences, city):
-        """Calculate score for restaurants based on preferences"""
-        scores = df['numeric_rate'] * 2  # Base score from rating
-        
-        # Budget bonus
-        if preferences['budget_only']:
-            scores += df['is_budget_friendly'] * 1
-        else:
-            # Slight penalty for expensive places if not explicitly asking for premium
-            city_threshold = self.city_data[city]['budget_threshold_restaurant']
-            scores -= (df['numeric_cost'] > city_threshold * 2) * 0.5
-        
-        # City specialty bonus
-        city_cuisines = self.city_data[city]['cuisine_specialty']
-        for specialty in city_cuisines:
-            cuisine_match = df['cuisines'].str.lower().str.contains(specialty, na=False, case=False)
-            scores += cuisine_match * 0.3
-        
-        # Known chain bonus
-        known_chains = self.city_data[city]['known_chains']
-        for chain in known_chains:
-            chain_match = df['name'].str.lower().str.contains(chain, na=False, case=False)
-            scores += chain_match * 0.2
-        
-        # Vote count bonus (popularity)
-        votes = pd.to_numeric(df['votes'], errors='coerce').fillna(0)
-        scores += np.log1p(votes) * 0.1
-        
-        return scores
+    def after_in_child():
+        target = ref()
+        if target is not None:
+            target._after_fork()
     
-    def _get_diverse_restaurants(self, df, num_recs):
-        """Get diverse restaurant recommendations by avoiding duplicates and ensuring variety"""
-        # Sort by score first
-        df = df.sort_values('score', ascending=False)
-        
-        selected_restaurants = []
-        seen_names = set()
-        
-        # Get unique restaurants without duplicates
-        for _, row in df.iterrows():
-            if len(selected_restaurants) >= num_recs:
+    os.register_at_fork(after_in_child=after_in_child)
+
+class CuisineBitset:
+    """Multi-label cuisine index: every listing's cuisines as a packed bitset.
+    
+    The comma separated cuisines are lower-cased into a token vocabulary, and
+    row i holds its tokens as the set bits of words[i] (uint64 words, 64 tokens
+    each). Each distinct cuisines string is tokenised once. A cuisine phrase
+    stands for every token holding its words in order, allowing a plural
+    's'/'es' as the query parser does: 'south indian' matches 'South Indian
+    Breakfast' and 'kebabs' matches 'Kebab', but 'tea' does not match 'Steak'.
+    Phrases resolve to token masks once (the given phrases at build time), so
+    filters and counts are bitwise ops over all rows.
+    """
+    _WORD_RE = re.compile(r'[a-z0-9]+')
+    
+    def __init__(self, cuisines, phrases=()):
+        codes, values = pd.factorize(cuisines)
+        self.vocabulary = {}
+        value_tokens = []
+        for text in values:
+            tokens = (token.strip() for token in str(text).lower().split(','))
+            value_tokens.append({self.vocabulary.setdefault(token, len(self.vocabulary)) for token in tokens if token})
+        
+        # Missing cells (code -1) take the trailing empty row
+        value_words = np.zeros((len(values) + 1, max(1, -(-len(self.vocabulary) // 64))), dtype=np.uint64)
+        for value, tokens in enumerate(value_tokens):
+            for token in tokens:
+                value_words[value, token // 64] |= np.uint64(1) << np.uint64(token % 64)
+        self.words = value_words[codes]
+        
+        # Words of each token (in id order), and the token mask of each phrase seen
+        self._token_words = [tuple(self._WORD_RE.findall(token)) for token in self.vocabulary]
+        self._phrase_masks = {}
+        for phrase in phrases:
+            self.phrase_mask(phrase)
+    
+    @staticmethod
+    def _same_word(a, b):
+        """Whether two words are equal up to a plural 's'/'es'"""
+        short, long = sorted((a, b), key=len)
+        return long in (short, short + 's', short + 'es')
+    
+    def phrase_mask(self, cuisine):
+        """Bitset of the vocabulary tokens containing the cuisine phrase (all zero if none)"""
+        mask = self._phrase_masks.get(cuisine)
+        if mask is None:
+            phrase = self._WORD_RE.findall(cuisine.lower())
+            mask = np.zeros(self.words.shape[1], dtype=np.uint64)
+            for token, words in enumerate(self._token_words):
+                if phrase and any(all(self._same_word(p, w) for p, w in zip(phrase, words[start:]))
+                                  for start in range(len(words) - len(phrase) + 1)):
+                    mask[token // 64] |= np.uint64(1) << np.uint64(token % 64)
+            self._phrase_masks[cuisine] = mask
+        return mask
+    
+    def serves(self, cuisine):
+        """Boolean mask of the rows with a token matching the cuisine phrase"""
+        return (self.words & self.phrase_mask(cuisine)).any(axis=1)
+    
+    def matches(self, cuisines, match_all=False):
+        """Boolean mask of the rows serving any (or, with match_all, every) one of the cuisines"""
+        if match_all:
+            rows = np.ones(len(self.words), dtype=bool)
+            for cuisine in cuisines:
+                rows &= self.serves(cuisine)
+            return rows
+        
+        mask = np.zeros(self.words.shape[1], dtype=np.uint64)
+        for cuisine in cuisines:
+            mask |= self.phrase_mask(cuisine)
+        return (self.words & mask).any(axis=1)
+    
+    def counts(self, cuisines):
+        """How many of the cuisines each row serves"""
+        counts = np.zeros(len(self.words), dtype=np.int64)
+        for cuisine in cuisines:
+            counts += self.serves(cuisine)
+        return counts
+
+class CatalogueIndex:
+    """Inverted index over one cleaned catalogue, built once at load time.
+    
+    Every posting list is a sorted array of row positions (iloc) into the
+    frame, so a query's candidates come from intersecting integer arrays
+    instead of rescanning and copying the whole frame.
+    """
+    EMPTY = np.array([], dtype=np.int64)
+    
+    def __init__(self, df, rating_col, cuisine_col=None):
+        self.size = len(df)
+        
+        # Per-city row ids, grouped on the (categorical) city codes
+        codes, cities = pd.factorize(df['detected_city'])
+        order = np.argsort(codes, kind='stable')
+        bounds = np.searchsorted(codes[order], np.arange(len(cities) + 1))
+        self.city_rows = {city: order[bounds[i]:bounds[i + 1]].astype(np.int64) for i, city in enumerate(cities)}
+        
+        self.budget_rows = np.flatnonzero(df['is_budget_friendly'].to_numpy() == 1)
+        
+        # Normalised listing names as integer keys, for de-duplicating results.
+        # Only distinct names are normalised; missing names share key -1.
+        codes, names = pd.factorize(df['name'])
+        keys = pd.factorize(pd.Series(names, dtype=object).astype(str).str.lower().str.strip())[0]
+        self.name_keys = np.append(keys, -1)[codes]
+        
+        # Rating-sorted arrays; NaN ratings sort last and never satisfy a minimum
+        ratings = df[rating_col].to_numpy(dtype=float)
+        self.rating_order = np.argsort(ratings, kind='stable')
+        self.sorted_ratings = ratings[self.rating_order]
+        self.rated_count = int(np.count_nonzero(~np.isnan(ratings)))
+        self._rating_rows = {}
+        
+        # Cuisine tokens per row as a bitset, the query lexicon's cuisines resolved up front
+        self.cuisines = CuisineBitset(df[cuisine_col], CUISINE_KEYWORDS) if cuisine_col is not None else None
+        self._cuisine_rows = {}
+    
+    def rows_rated_at_least(self, rating_min):
+        """Sorted row ids with rating >= rating_min"""
+        if rating_min not in self._rating_rows:
+            start = np.searchsorted(self.sorted_ratings[:self.rated_count], rating_min, side='left')
+            self._rating_rows[rating_min] = np.sort(self.rating_order[start:self.rated_count])
+        return self._rating_rows[rating_min]
+    
+    def rows_with_cuisine(self, cuisines, match_all=False):
+        """Sorted row ids serving any (or, with match_all, every) one of the given cuisines"""
+        if self.cuisines is None:
+            return self.EMPTY
+        key = (tuple(sorted(cuisines)), match_all)
+        if key not in self._cuisine_rows:
+            self._cuisine_rows[key] = np.flatnonzero(self.cuisines.matches(cuisines, match_all))
+        return self._cuisine_rows[key]
+    
+    def candidates(self, city=None, budget_only=False, rating_min=0, cuisines=None, within=None,
+                   match_all_cuisines=False):
+        """Sorted row ids matching every given filter.
+        
+        within is an extra sorted array of allowed row ids, e.g. from a spatial lookup.
+        Listings match cuisines if they serve any of them, or all with match_all_cuisines.
+        """
+        postings = []
+        if within is not None:
+            postings.append(within)
+        if city is not None:
+            postings.append(self.city_rows.get(city, self.EMPTY))
+        if budget_only:
+            postings.append(self.budget_rows)
+        if rating_min > 0:
+            postings.append(self.rows_rated_at_least(rating_min))
+        if cuisines:
+            postings.append(self.rows_with_cuisine(cuisines, match_all_cuisines))
+        
+        if not postings:
+            return np.arange(self.size)
+        
+        # Intersect smallest first so the work is bounded by the most selective filter
+        postings.sort(key=len)
+        result = postings[0]
+        for rows in postings[1:]:
+            if len(result) == 0:
                 break
-            
-            name = row['name'].lower().strip()
-            
-            # Skip if we've seen this exact name
-            if name in seen_names:
-                continue
-            
-            selected_restaurants.append(row)
-            seen_names.add(name)
-        
-        # Convert back to DataFrame
-        if selected_restaurants:
-            return pd.DataFrame(selected_restaurants).reset_index(drop=True)
+            result = self._intersect_sorted(result, rows)
+        return result
+    
+    @staticmethod
+    def _intersect_sorted(small, large):
+        """Intersect two sorted unique arrays in O(len(small) * log(len(large)))"""
+        if len(large) == 0:
+            return CatalogueIndex.EMPTY
+        pos = np.searchsorted(large, small)
+        pos[pos == len(large)] = 0
+        return small[large[pos] == small]
+
+class SpatialIndex:
+    """BallTree (haversine metric) over listing coordinates for location queries.
+    
+    Rows without valid coordinates are left out; results are row positions
+    (iloc) into the indexed frame with distances in km.
+    """
+    def __init__(self, latitudes, longitudes):
+        latitudes = pd.to_numeric(pd.Series(latitudes), errors='coerce').to_numpy(dtype=float)
+        longitudes = pd.to_numeric(pd.Series(longitudes), errors='coerce').to_numpy(dtype=float)
+        valid = (np.isfinite(latitudes) & np.isfinite(longitudes)
+                 & (np.abs(latitudes) <= 90) & (np.abs(longitudes) <= 180))
+        
+        self.rows = np.flatnonzero(valid)
+        self.size = len(self.rows)
+        if self.size:
+            self.tree = BallTree(np.radians(np.column_stack([latitudes[valid], longitudes[valid]])), metric='haversine')
         else:
-            return df.head(0)  # Empty DataFrame
-        
-    def _get_hotel_recommendations(self, query, detected_city, preferences, num_recs):
-        """Get hotel recommendations based on city and preferences"""
-        df = self.hotel_data.copy()
-        
-        # Filter by city if specific city detected
-        if detected_city != 'bangalore' or any(city in query for city in self.city_data.keys()):
-            df = df[df['detected_city'] == detected_city]
-        
-        # Apply budget filter based on preferences
-        if preferences['budget_only']:
-            df = df[df['is_budget_friendly'] == 1]
-        elif not preferences['show_premium']:
-            pass  # Show all price ranges but prioritize budget
-        
-        # Filter by rating if specified
-        if preferences['rating_min'] > 0:
-            df = df[df['numeric_rating'] >= preferences['rating_min']]
-        
-        if len(df) == 0:
-            return []
-        
-        # Calculate scores
-        df = df.copy()
-        df['score'] = self._calculate_hotel_score(df, preferences, detected_city)
-        
-        # Remove duplicates and get diverse recommendations
-        df = self._get_diverse_hotels(df, num_recs)
-        
-        recommendations = []
-        for _, row in df.iterrows():
-            rec = {
-                'type': 'Hotel',
-                'name': row['name'],
-                'location': row['location'],
-                'city': row['detected_city'].title(),
-                'rating': f"{row['numeric_rating']}/5",
-                'price': f"Rs {row['numeric_price']} per night",
-                'stars': f"{row['stars']} star",
-                'budget_friendly': bool(row['is_budget_friendly'])
+            self.tree = None
+    
+    @staticmethod
+    def _point(lat, lon):
+        return np.radians([[float(lat), float(lon)]])
+    
+    def within_radius(self, lat, lon, radius_km):
+        """Sorted row ids within radius_km of the point, and their distances"""
+        if self.tree is None:
+            return CatalogueIndex.EMPTY, np.array([])
+        ind, dist = self.tree.query_radius(self._point(lat, lon), r=radius_km / EARTH_RADIUS_KM, return_distance=True)
+        rows = self.rows[ind[0]]
+        order = np.argsort(rows)
+        return rows[order], dist[0][order] * EARTH_RADIUS_KM
+    
+    def nearest(self, lat, lon, k):
+        """Row ids of the k nearest listings, closest first, and their distances"""
+        k = min(k, self.size)
+        if k <= 0:
+            return CatalogueIndex.EMPTY, np.array([])
+        dist, ind = self.tree.query(self._point(lat, lon), k=k)
+        return self.rows[ind[0]], dist[0] * EARTH_RADIUS_KM
+
+class TextIndex:
+    """TF-IDF retrieval over one catalogue's combined_features.
+    
+    Each distinct description is vectorised once into a sparse CSR matrix; a
+    query is scored with one sparse matrix-vector product against it (cosine
+    similarity, as rows and query are L2-normalised) and the result is
+    broadcast to rows through their description codes. Only the descriptions
+    sharing a term with the query are cached per query, so cached queries cost
+    memory in proportion to their matches, not to the catalogue.
+    """
+    def __init__(self, vectorizer, texts, cache_size=1024):
+        self.codes, descriptions = pd.factorize(pd.Series(texts))
+        self.descriptions = pd.Index(np.asarray(descriptions, dtype=object))
+        self.vectorizer = vectorizer
+        self.cache_size = cache_size
+        try:
+            self.matrix = vectorizer.fit_transform(pd.Series(descriptions, dtype=object).astype(str)).tocsr()
+        except ValueError:  # Empty vocabulary, e.g. no descriptions or only stop words
+            self.matrix = None
+        self.analyzer = vectorizer.build_analyzer()
+        self.vocabulary = vectorizer.vocabulary_ if self.matrix is not None else {}
+        self.similarity = functools.lru_cache(maxsize=cache_size)(self._similarity)
+    
+    def patched(self, removed, texts):
+        """Copy of the index with the rows at positions removed dropped and texts appended as rows.
+        
+        New descriptions are vectorised with the fitted vocabulary and IDF weights,
+        so existing rows score as before; terms first seen in them are only learnt
+        when the index is rebuilt.
+        """
+        texts = pd.Series(texts, dtype=object)
+        patched = copy.copy(self)
+        codes = self.descriptions.get_indexer(texts)
+        new_descriptions = pd.Index(pd.unique(texts[(codes == -1) & texts.notna()]))
+        if len(new_descriptions):
+            if self.matrix is not None:
+                added = self.vectorizer.transform(new_descriptions.astype(str))
+                patched.matrix = sparse.vstack([self.matrix, added]).tocsr()
+            patched.descriptions = self.descriptions.append(new_descriptions)
+            codes = patched.descriptions.get_indexer(texts)
+        
+        patched.codes = np.concatenate([np.delete(self.codes, removed), codes])
+        patched.similarity = functools.lru_cache(maxsize=self.cache_size)(patched._similarity)
+        return patched
+    
+    def _similarity(self, terms):
+        """Sorted codes of the descriptions sharing a term with the query, and their similarities"""
+        query = self.vectorizer.transform([' '.join(terms)])
+        matches = (self.matrix @ query.T).tocoo()
+        order = np.argsort(matches.row, kind='stable')
+        return matches.row[order].astype(np.int64), matches.data[order]
+    
+    def scores(self, terms, rows=None):
+        """Similarity of rows (positions; all when None) to the query terms, or None without a match"""
+        if self.matrix is None or not terms:
+            return None
+        matched, similarity = self.similarity(terms)
+        codes = self.codes if rows is None else self.codes[rows]
+        if len(matched) == 0:
+            return np.zeros(len(codes))
+        # Rows whose description did not match (or have none, code -1) score 0
+        positions = np.minimum(np.searchsorted(matched, codes), len(matched) - 1)
+        return np.where(matched[positions] == codes, similarity[positions], 0.0)
+
+class ResultCache:
+    """Thread-safe LRU cache of ranked results whose entries expire after ttl seconds.
+    
+    clear() starts a new generation: a result computed from the data before
+    it is dropped by put() instead of being cached over the new data.
+    """
+    def __init__(self, maxsize=DEFAULT_RESULT_CACHE_SIZE, ttl=DEFAULT_RESULT_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.generation = 0
+        self.hits = self.misses = self.evictions = self.expirations = 0
+        self._entries = OrderedDict()  # key -> (stored at, value), least recently used first
+        self._lock = threading.Lock()
+        register_after_fork(self)
+    
+    def _after_fork(self):
+        """Replace the lock, which a thread of the parent may have held at the fork"""
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        """Cached value for key, or None when it is missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and time.monotonic() - entry[0] > self.ttl:
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+    
+    def put(self, key, value, generation):
+        """Cache value, computed during generation, evicting least recently used entries"""
+        with self._lock:
+            if self.maxsize <= 0 or generation != self.generation:
+                return
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def clear(self):
+        """Drop every entry and start a new generation"""
+        with self._lock:
+            self._entries.clear()
+            self.generation += 1
+    
+    def stats(self):
+        """Size, limits and hit/miss/eviction counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
             }
-            recommendations.append(rec)
-            
-        return recommendations
+
+# Query lexicons, matched on whole words by QueryParser
+BUDGET_KEYWORDS = ['budget', 'cheap', 'affordable', 'low cost', 'economical']
+PREMIUM_KEYWORDS = ['premium', 'luxury', 'high end', 'expensive', 'fine dining', 'best']
+CUISINE_KEYWORDS = {
+    'south indian': ['south indian', 'dosa', 'idli', 'sambar', 'udupi'],
+    'north indian': ['north indian', 'roti', 'naan', 'punjabi', 'dal'],
+    'chinese': ['chinese', 'noodles', 'fried rice', 'manchurian'],
+    'italian': ['italian', 'pizza', 'pasta', 'continental'],
+    'fast food': ['fast food', 'burger', 'sandwich'],
+    'biryani': ['biryani', 'dum biryani', 'chicken biryani'],
+    'street food': ['street food', 'chaat', 'pani puri']
+}
+MEAL_KEYWORDS = {
+    'breakfast': ['breakfast', 'morning'],
+    'lunch': ['lunch', 'afternoon'],
+    'dinner': ['dinner', 'evening'],
+    'snacks': ['snacks', 'evening snacks']
+}
+RATING_KEYWORDS = {
+    4.0: ['highly rated', 'top rated', 'best rated'],
+    3.5: ['good']
+}
+RESTAURANT_KEYWORDS = ['restaurant', 'food', 'eat', 'dining', 'cuisine', 'meal', 'lunch', 'dinner', 'breakfast']
+HOTEL_KEYWORDS = ['hotel', 'stay', 'accommodation', 'room', 'lodge', 'guest', 'night']
+INTENT_WORDS = frozenset(RESTAURANT_KEYWORDS + HOTEL_KEYWORDS)
+
+class QueryParser:
+    """Single-pass parser for free-text queries, built once from the city data and lexicons.
     
-    def _calculate_hotel_score(self, df, preferences, city):
-        """Calculate score for hotels based on preferences"""
-        scores = df['numeric_rating'] * 2  # Base score from rating
-        
-        # Budget bonus
-        if preferences['budget_only']:
-            scores += df['is_budget_friendly'] * 1
-        else:
-            city_threshold = self.city_data[city]['budget_threshold_hotel']
-            scores -= (df['numeric_price'] > city_threshold * 2) * 0.5
-        
-        # Star rating bonus
-        stars = pd.to_numeric(df['stars'], errors='coerce').fillna(3)
-        scores += stars * 0.2
-        
-        return scores
+    Every keyword phrase is stored in a trie keyed by words, so a query is
+    parsed with one walk over its words. Phrases only match whole words
+    ('good' does not fire inside 'goodies'), allowing a plural 's'/'es'
+    ('restaurants', 'sandwiches'). Parsed queries are LRU-cached on the
+    normalised text.
+    """
+    _WORD_RE = re.compile(r'[a-z0-9]+')
+    _PAYLOAD = None  # Trie key holding the matches that end at a node
+    
+    def __init__(self, city_data, cache_size=4096):
+        self.cities = list(city_data.keys())
+        self._trie = {}
+        self._max_phrase_words = 1
+        
+        for city, info in city_data.items():
+            self._add(city, ('city_name', city))
+            for area in info['popular_areas']:
+                self._add(area, ('city', city))
+        for keyword in BUDGET_KEYWORDS:
+            self._add(keyword, ('budget', True))
+        for keyword in PREMIUM_KEYWORDS:
+            self._add(keyword, ('premium', True))
+        for cuisine, keywords in CUISINE_KEYWORDS.items():
+            for keyword in keywords:
+                self._add(keyword, ('cuisine', cuisine))
+        for meal, keywords in MEAL_KEYWORDS.items():
+            for keyword in keywords:
+                self._add(keyword, ('meal', meal))
+        for rating, keywords in RATING_KEYWORDS.items():
+            for keyword in keywords:
+                self._add(keyword, ('rating', rating))
+        for keyword in RESTAURANT_KEYWORDS:
+            self._add(keyword, ('intent', 'restaurant'))
+        for keyword in HOTEL_KEYWORDS:
+            self._add(keyword, ('intent', 'hotel'))
+        
+        self._parse_cached = functools.lru_cache(maxsize=cache_size)(self._parse_normalized)
     
-    def _get_diverse_hotels(self, df, num_recs):
-        """Get diverse hotel recommendations by avoiding duplicates"""
-        # Sort by score first
-        df = df.sort_values('score', ascending=False)
+    def _add(self, phrase, payload):
+        """Add a keyword phrase to the word trie"""
+        words = self._WORD_RE.findall(phrase.lower())
+        node = self._trie
+        for word in words:
+            node = node.setdefault(word, {})
+        node.setdefault(self._PAYLOAD, []).append(payload)
+        self._max_phrase_words = max(self._max_phrase_words, len(words))
+    
+    def _child(self, node, word):
+        """Follow a word in the trie, falling back to its singular form"""
+        child = node.get(word)
+        if child is None and word.endswith('s'):
+            child = node.get(word[:-1])
+            if child is None and word.endswith('es'):
+                child = node.get(word[:-2])
+        return child
+    
+    def normalize(self, query):
+        """Lowercase a query and collapse it to its words"""
+        return ' '.join(self._WORD_RE.findall(query.lower()))
+    
+    def parse(self, query):
+        """Parse a query into its city, preferences and the catalogues it asks for"""
+        parsed = self._parse_cached(self.normalize(query))
+        # The cached dict is shared, so hand out copies of the mutable parts
+        parsed = dict(parsed)
+        parsed['preferences'] = {key: list(value) if isinstance(value, list) else value
+                                 for key, value in parsed['preferences'].items()}
+        return parsed
+    
+    def _parse_normalized(self, query):
+        """Parse an already normalised query with one walk over the word trie"""
+        words = query.split()
+        matches = {}
+        for start in range(len(words)):
+            node = self._trie
+            for word in words[start:start + self._max_phrase_words]:
+                node = self._child(node, word)
+                if node is None:
+                    break
+                for kind, value in node.get(self._PAYLOAD, ()):
+                    matches.setdefault(kind, set()).add(value)
         
-        selected_hotels = []
-        seen_names = set()
-        seen_locations = set()
+        # Cities are tried in city_data order, defaulting to bangalore as the
+        # dataset is primarily bangalore
+        named_cities = matches.get('city_name', set())
+        mentioned = named_cities | matches.get('city', set())
+        detected_city = next((city for city in self.cities if city in mentioned), 'bangalore')
         
-        for _, row in df.iterrows():
-            if len(selected_hotels) >= num_recs:
-                break
-            
-            name = row['name'].lower().strip()
-            location = row['location'].lower().strip()
-            
-            # Skip exact duplicate names
-            if name in seen_names:
-                continue
-            
-            # Add the hotel
-            selected_hotels.append(row)
-            seen_names.add(name)
-            seen_locations.add(location)
-        
-        # If we don't have enough diverse hotels, fill with remaining ones
-        if len(selected_hotels) < num_recs:
-            for _, row in df.iterrows():
-                if len(selected_hotels) >= num_recs:
-                    break
-                
-                name = row['name'].lower().strip()
-                if name not in seen_names:
-                    selected_hotels.append(row)
-                    seen_names.add(name)
-        
-        # Convert back to DataFrame
-        if selected_hotels:
-            return pd.DataFrame(selected_hotels).reset_index(drop=True)
-        else:
-            return df.head(0)  # Empty DataFrame
-    
-    def print_recommendations(self, recommendations, detected_city=None, preferences=None):
-        """Print recommendations with city and preference information"""
-        if not recommendations:
-            print("No recommendations found. Try a different query or location!")
-            return
+        ratings = matches.get('rating', set())
+        preferences = {
+            'budget_only': 'budget' in matches,
+            'cuisine': [cuisine for cuisine in CUISINE_KEYWORDS if cuisine in matches.get('cuisine', ())],
+            'meal_type': [meal for meal in MEAL_KEYWORDS if meal in matches.get('meal', ())],
+            'rating_min': max(ratings) if ratings else 0,
+            'show_premium': 'premium' in matches
+        }
         
-        print(f"\nFound {len(recommendations)} Recommendations")
-        if detected_city:
-            print(f"City: {detected_city.title()}")
-        if preferences and (preferences['budget_only'] or preferences['show_premium']):
-            pref_type = "Budget" if preferences['budget_only'] else "Premium" if preferences['show_premium'] else "All"
-            print(f"Preference: {pref_type}")
-        print()
+        intents = matches.get('intent', set())
+        wants_restaurants = 'restaurant' in intents
+        wants_hotels = 'hotel' in intents
         
-        for i, rec in enumerate(recommendations, 1):
-            print(f"{i}. {rec['name']} ({rec['type']})")
-            print(f"   Location: {rec['location']}")
-            if 'city' in rec:
-                print(f"   City: {rec['city']}")
-            print(f"   Rating: {rec['rating']}")
-            
-            if rec['type'] == 'Restaurant':
-                print(f"   Cost: {rec['cost']}")
-                print(f"   Cuisine: {rec['cuisine']}")
-            else:  # Hotel
-                print(f"   Price: {rec['price']}")
-                print(f"   Category: {rec['stars']}")
-            
-            budget_status = "Yes" if rec['budget_friendly'] else "No"
-            print(f"   Budget Friendly: {budget_status}")
-            print()
+        # If neither specified, provide both
+        if not wants_restaurants and not wants_hotels:
+            wants_restaurants = wants_hotels = True
+        
+        return {
+            'query': query,
+            'city': detected_city,
+            'names_city': bool(named_cities),
+            'preferences': preferences,
+            'wants_restaurants': wants_restaurants,
+            'wants_hotels': wants_hotels
+        }
 
-def main():
-    """Main function to run the recommendation system"""
-    print("Multi-City Recommendation System")
-    print("=" * 50)
-    
-    # Initialize system
-    system = MultiCityRecommendationSystem()
+class Catalogue:
+    """One catalogue's cleaned frame with its query-time indexes, budget model and encoders.
     
-    # Load and process data
-    system.load_and_preprocess_data()
+    Immutable: every change builds a new Catalogue, which the system swaps in
+    with one reference assignment, and each request reads the catalogues once.
+    A query therefore never combines row ids from one version with the frame
+    of another, and a model is never used with another model's encoders.
+    """
+    FIELDS = ('data', 'index', 'text_index', 'embedding_index', 'spatial_index', 'model', 'le_location', 'le_type')
+    __slots__ = FIELDS
     
-    # Train models
-    system.train_models()
+    def __init__(self, **fields):
+        unknown = set(fields) - set(self.FIELDS)
+        if unknown:
+            raise TypeError(f"Unknown catalogue fields: {sorted(unknown)}")
+        for field in self.FIELDS:
+            object.__setattr__(self, field, fields.get(field))
     
-    print("\nSystem ready! Ask for recommendations with preferences and locations.")
-    print("Examples:")
-    print("- 'budget restaurants in Mumbai'")
-    print("- 'best biryani places in Hyderabad'")
-    print("- 'luxury hotels in Delhi'")
-    print("- 'south indian food in Chennai'")
-    print("Type 'quit' to exit.\n")
+    def __setattr__(self, name, value):
+        raise AttributeError("Catalogue is immutable; use replace()")
     
-    # Interactive loop
-    while True:
-        try:
-            user_input = input("What are you looking for? ").strip()
-            
-            if user_input.lower() in ['quit', 'exit', 'bye']:
-                print("Thanks for using the Recommendation System!")
-                break
-                
-            if not user_input:
-                print("Please enter a query!")
-                continue
-            
-            # Get recommendations
-            recommendations, detected_city, preferences = system.get_recommendations(user_input)
-            system.print_recommendations(recommendations, detected_city, preferences)
-            
-        except KeyboardInterrupt:
-            print("\nThanks for using the Recommendation System!")
-            break
-        except Exception as e:
-            print(f"An error occurred: {e}")
-
-if __name__ == "__main__":
-=======
-#!/usr/bin/env python3
-"""
-Multi-City Budget Recommendation System
-======================================
-An ML-powered system that recommends restaurants and hotels
-based on user queries, location, and preferences using real data.
-"""
+    def replace(self, **changes):
+        """A new Catalogue with the given fields changed"""
+        fields = {field: getattr(self, field) for field in self.FIELDS}
+        fields.update(changes)
+        return Catalogue(**fields)
 
-import pandas as pd
-import numpy as np
-import re
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.preprocessing import LabelEncoder, StandardScaler
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-import warnings
-warnings.filterwarnings('ignore')
+def catalogue_properties(cls):
+    """Class decorator adding read-only restaurant_data, hotel_index, restaurant_model, ...
+    properties for the fields of the system's current catalogues
+    """
+    def current(kind, field):
+        return property(lambda self: getattr(self._catalogues[kind], field),
+                        doc=f"{field} of the current {kind} catalogue (read-only)")
+    
+    for kind in ('restaurant', 'hotel'):
+        for field in Catalogue.FIELDS:
+            setattr(cls, f'{kind}_{field}', current(kind, field))
+    return cls
 
+@catalogue_properties
 class MultiCityRecommendationSystem:
-    def __init__(self):
-        self.restaurant_data = None
-        self.hotel_data = None
-        self.restaurant_model = None
-        self.hotel_model = None
-        self.vectorizer = TfidfVectorizer(max_features=100, stop_words='english')
+    # State persisted by save_snapshot() and restored by load_snapshot()
+    SNAPSHOT_ATTRIBUTES = (
+        'restaurant_model', 'hotel_model',
+        'restaurant_le_location', 'restaurant_le_type', 'hotel_le_location',
+        'training_report'
+    )
+    # Cleaned frames; snapshotted only when the columnar catalogue cache is unavailable
+    CATALOGUE_ATTRIBUTES = ('restaurant_data', 'hotel_data')
+
+    def __init__(self, data_dir=MODEL_DIR, data_paths=None, chunksize=DEFAULT_CHUNKSIZE, catalogue_cache=True,
+                 semantic_k=None, result_cache_size=DEFAULT_RESULT_CACHE_SIZE,
+                 result_cache_ttl=DEFAULT_RESULT_CACHE_TTL):
+        # Relative paths resolve against data_dir, not the working directory
+        self.data_paths = {
+            'restaurant': next((feed for feed in DEFAULT_RESTAURANT_FEEDS
+                                if os.path.exists(os.path.join(data_dir, feed))), DEFAULT_RESTAURANT_FEEDS[0]),
+            'hotel': 'oyobanglore.csv'
+        }
+        self.data_paths.update(data_paths or {})
+        self.data_paths = {kind: os.path.join(data_dir, path) for kind, path in self.data_paths.items()}
+        self.chunksize = chunksize
+        self.catalogue_cache = catalogue_cache and pa is not None
+        # Nearest listing descriptions the embedding index pre-selects per query; None disables it
+        self.semantic_k = semantic_k
+        # Ranked results keyed on the parsed query; cleared whenever the data or models change
+        self.result_cache = ResultCache(result_cache_size, result_cache_ttl)
+        # Listing updates since the last training, and the share of a catalogue that triggers a retrain
+        self.pending_changes = {'restaurant': 0, 'hotel': 0}
+        self.retrain_fraction = RETRAIN_FRACTION
+        self._update_lock = threading.RLock()
+        self._retrain_thread = None
+        register_after_fork(self)
+        # Frame, indexes and budget model of each catalogue, only ever replaced as a
+        # whole; restaurant_data, hotel_index, ... read the current ones
+        self._catalogues = {'restaurant': Catalogue(), 'hotel': Catalogue()}
+        self.training_report = None
+        # Template for the per-catalogue TextIndex vectorizers
+        self.vectorizer = TfidfVectorizer(max_features=5000, stop_words='english')
         self.scaler = StandardScaler()
         self.city_data = self._initialize_city_data()
-        
+        self.query_parser = QueryParser(self.city_data)
+        
+    def _after_fork(self):
+        """Reset update state a thread of the parent may have held at the fork;
+        a retrain running there is not running in the child
+        """
+        self._update_lock = threading.RLock()
+        self._retrain_thread = None
+    
     def _initialize_city_data(self):
         """Initialize city-specific knowledge base"""
         return {
@@ -775,155 +764,390 @@ class MultiCityRecommendationSystem:
         
     def detect_city_from_query(self, query):
         """Detect city from user query"""
-        query = query.lower()
-        
-        for city in self.city_data.keys():
-            if city in query:
-                return city
-                
-            # Check for popular areas
-            for area in self.city_data[city]['popular_areas']:
-                if area in query:
-                    return city
-        
-        # Default to bangalore as dataset is primarily bangalore
-        return 'bangalore'
+        return self.query_parser.parse(query)['city']
         
     def extract_preferences(self, query):
         """Extract user preferences from query"""
-        query = query.lower()
-        preferences = {
-            'budget_only': False,
-            'cuisine': [],
-            'meal_type': [],
-            'rating_min': 0,
-            'show_premium': False
-        }
-        
-        # Budget indicators
-        budget_keywords = ['budget', 'cheap', 'affordable', 'low cost', 'economical']
-        preferences['budget_only'] = any(keyword in query for keyword in budget_keywords)
-        
-        # Premium indicators
-        premium_keywords = ['premium', 'luxury', 'high end', 'expensive', 'fine dining', 'best']
-        preferences['show_premium'] = any(keyword in query for keyword in premium_keywords)
-        
-        # Cuisine preferences
-        cuisine_keywords = {
-            'south indian': ['south indian', 'dosa', 'idli', 'sambar', 'udupi'],
-            'north indian': ['north indian', 'roti', 'naan', 'punjabi', 'dal'],
-            'chinese': ['chinese', 'noodles', 'fried rice', 'manchurian'],
-            'italian': ['italian', 'pizza', 'pasta', 'continental'],
-            'fast food': ['fast food', 'burger', 'sandwich'],
-            'biryani': ['biryani', 'dum biryani', 'chicken biryani'],
-            'street food': ['street food', 'chaat', 'pani puri']
-        }
+        return self.query_parser.parse(query)['preferences']
+    
+    def _compile_city_patterns(self):
+        """Compile one regex alternation per city over its name and popular areas"""
+        patterns = []
+        for city, info in self.city_data.items():
+            tokens = [city] + info['popular_areas']
+            patterns.append((city, re.compile('|'.join(re.escape(token) for token in tokens))))
+        return patterns
+    
+    def _detect_cities(self, text):
+        """Detect the city for each lowercase text in a Series.
         
-        for cuisine, keywords in cuisine_keywords.items():
-            if any(keyword in query for keyword in keywords):
-                preferences['cuisine'].append(cuisine)
+        Cities are tried in city_data order and the first one whose name or
+        popular area occurs in the text wins, defaulting to bangalore.
+        """
+        # Listings repeat the same few location strings, so match each distinct text once
+        codes, uniques = pd.factorize(text)
+        uniques = pd.Series(uniques, dtype=object)
         
-        # Meal type
-        meal_keywords = {
-            'breakfast': ['breakfast', 'morning'],
-            'lunch': ['lunch', 'afternoon'],
-            'dinner': ['dinner', 'evening'],
-            'snacks': ['snacks', 'evening snacks']
-        }
+        detected = np.full(len(uniques), 'bangalore', dtype=object)
+        unresolved = np.arange(len(uniques))
         
-        for meal, keywords in meal_keywords.items():
-            if any(keyword in query for keyword in keywords):
-                preferences['meal_type'].append(meal)
+        for city, pattern in self._compile_city_patterns():
+            if len(unresolved) == 0:
+                break
+            # Only texts no earlier city claimed are scanned again
+            matched = uniques.iloc[unresolved].str.contains(pattern).to_numpy(dtype=bool)
+            detected[unresolved[matched]] = city
+            unresolved = unresolved[~matched]
         
-        # Rating preferences
-        if 'highly rated' in query or 'top rated' in query or 'best rated' in query:
-            preferences['rating_min'] = 4.0
-        elif 'good' in query:
-            preferences['rating_min'] = 3.5
-            
-        return preferences
-    
-    def _detect_restaurant_city(self, row):
-        """Detect city for a restaurant row"""
-        location = str(row.get('location', '')).lower()
-        address = str(row.get('address', '')).lower()
-        city_listed = str(row.get('listed_in(city)', '')).lower()
-        
-        combined_text = f"{location} {address} {city_listed}"
-        
-        for city in self.city_data.keys():
-            if city in combined_text:
-                return city
-            for area in self.city_data[city]['popular_areas']:
-                if area in combined_text:
-                    return city
-        
-        return 'bangalore'  # Default
-    
-    def _detect_hotel_city(self, row):
-        """Detect city for a hotel row"""
-        location = str(row.get('location', '')).lower()
-        
-        for city in self.city_data.keys():
-            if city in location:
-                return city
-            for area in self.city_data[city]['popular_areas']:
-                if area in location:
-                    return city
-        
-        return 'bangalore'  # Default
-    
-    def _classify_restaurant_budget(self, row):
-        """Classify restaurant as budget friendly based on city"""
-        city = row['detected_city']
-        cost = row['numeric_cost']
-        threshold = self.city_data[city]['budget_threshold_restaurant']
-        return 1 if cost <= threshold else 0
-    
-    def _classify_hotel_budget(self, row):
-        """Classify hotel as budget friendly based on city"""
-        city = row['detected_city']
-        price = row['numeric_price']
-        threshold = self.city_data[city]['budget_threshold_hotel']
-        return 1 if price <= threshold else 0
+        return pd.Series(detected[codes], index=text.index, dtype=object)
+    
+    def _combine_text_columns(self, df, columns):
+        """Join the given columns into one lowercase string per row (missing values as 'nan')"""
+        parts = []
+        for col in columns:
+            if col in df.columns:
+                parts.append(df[col].astype(object).fillna('nan').astype(str))
+            else:
+                parts.append(pd.Series('', index=df.index, dtype=object))
+        return parts[0].str.cat(parts[1:], sep=' ').str.lower()
+    
+    def _detect_restaurant_city(self, df):
+        """Detect city for every restaurant from its location, address and listed city"""
+        return self._detect_cities(self._combine_text_columns(df, ['location', 'address', 'listed_in(city)']))
+    
+    def _detect_hotel_city(self, df):
+        """Detect city for every hotel from its location"""
+        return self._detect_cities(self._combine_text_columns(df, ['location']))
+    
+    def _classify_restaurant_budget(self, df):
+        """Classify restaurants as budget friendly based on their city's threshold"""
+        thresholds = {city: info['budget_threshold_restaurant'] for city, info in self.city_data.items()}
+        return (df['numeric_cost'] <= df['detected_city'].map(thresholds)).astype(int)
+    
+    def _classify_hotel_budget(self, df):
+        """Classify hotels as budget friendly based on their city's threshold"""
+        thresholds = {city: info['budget_threshold_hotel'] for city, info in self.city_data.items()}
+        return (df['numeric_price'] <= df['detected_city'].map(thresholds)).astype(int)
+    
     def load_and_preprocess_data(self):
         """Load and preprocess restaurant and hotel data"""
+        self._install_frames(self._load_frames())
+        print("Data preprocessing completed!")
+    
+    def _load_frames(self):
+        """Cleaned restaurant and hotel frames by kind; a feed that fails to load is left out"""
         print("Loading and preprocessing data...")
+        frames = {}
         
         # Load restaurant data (Zomato)
         try:
-            self.restaurant_data = pd.read_csv('zomato.csv')
-            self.restaurant_data = self._clean_restaurant_data(self.restaurant_data)
+            frames['restaurant'] = self._load_catalogue(self.data_paths['restaurant'], RESTAURANT_SCHEMA,
+                                                        self._clean_restaurant_data)
         except Exception as e:
             print(f"Error loading restaurant data: {e}")
             
         # Load hotel data (OYO)
         try:
-            self.hotel_data = pd.read_csv('oyobanglore.csv')
-            self.hotel_data = self._clean_hotel_data(self.hotel_data)
+            frames['hotel'] = self._load_catalogue(self.data_paths['hotel'], HOTEL_SCHEMA, self._clean_hotel_data)
         except Exception as e:
             print(f"Error loading hotel data: {e}")
+        
+        return frames
+    
+    def _load_catalogue(self, path, schema, clean):
+        """Cleaned catalogue for one feed, from its columnar cache when that is fresh"""
+        if not self.catalogue_cache:
+            return self._read_feed(path, schema, clean)
+        
+        cache_path = catalogue_cache_path(path)
+        df = self._read_catalogue_cache(cache_path, path)
+        if df is not None:
+            print(f"Loaded cleaned catalogue from {cache_path}")
+            return df
+        
+        df = self._read_feed(path, schema, clean)
+        try:
+            self._write_catalogue_cache(df, cache_path, path)
+        except (OSError, pa.ArrowException) as e:
+            print(f"Error writing catalogue cache: {e}")
+        return df
+    
+    @staticmethod
+    def _catalogue_versions():
+        """Code and library versions a cached catalogue depends on"""
+        return {'snapshot_version': SNAPSHOT_VERSION, 'pandas': pd.__version__, 'pyarrow': pa.__version__}
+    
+    def _write_catalogue_cache(self, df, cache_path, source_path):
+        """Write a cleaned frame as an uncompressed Arrow IPC file, tagged with its source"""
+        stat = os.stat(source_path)
+        key = {
+            'versions': self._catalogue_versions(),
+            'source_size': stat.st_size,
+            'source_mtime_ns': stat.st_mtime_ns,
+            'source_sha256': file_sha256(source_path)
+        }
+        # One record batch: a column spread over several batches is concatenated (copied)
+        # by to_pandas in every worker, while a single chunk maps zero-copy
+        table = pa.Table.from_pandas(df, preserve_index=True).combine_chunks()
+        table = table.replace_schema_metadata({**table.schema.metadata, b'catalogue_key': json.dumps(key).encode()})
+        
+        # Write next to the target and rename, so concurrent workers never map a partial file
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with pa.OSFile(tmp_path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        os.replace(tmp_path, cache_path)
+        print(f"Catalogue cache saved to {cache_path}")
+    
+    def _read_catalogue_cache(self, cache_path, source_path):
+        """Memory-map a cached catalogue; None if it is missing or stale.
+        
+        Columns stay backed by the mapped file where Arrow allows it, so worker
+        processes on one host share its page-cached pages.
+        """
+        try:
+            reader = pa.ipc.open_file(pa.memory_map(cache_path))
+            key = json.loads(reader.schema.metadata[b'catalogue_key'])
+            stat = os.stat(source_path)
+        except (OSError, KeyError, TypeError, ValueError, pa.ArrowException):
+            return None
+        
+        # A source with the same size and mtime is trusted; a touched one only if its content is unchanged
+        unchanged = (key['source_size'], key['source_mtime_ns']) == (stat.st_size, stat.st_mtime_ns)
+        if key['versions'] != self._catalogue_versions() or not (unchanged or key['source_sha256'] == file_sha256(source_path)):
+            print(f"Catalogue cache {cache_path} is stale, rebuilding it")
+            return None
+        
+        return reader.read_all().to_pandas(split_blocks=True)
+    
+    def _read_feed(self, path, schema, clean):
+        """Stream a CSV in chunks of self.chunksize rows (all at once when None),
+        cleaning each chunk and storing it with the schema's dtypes before the next is read
+        """
+        aliases = schema.get('aliases', {})
+        reader = pd.read_csv(path, usecols=lambda col: col in schema['columns'] or col in aliases, dtype=str,
+                             chunksize=self.chunksize)
+        if self.chunksize is None:
+            return self._apply_dtypes(clean(reader.rename(columns=aliases)), schema['dtypes'])
+        
+        with reader:
+            chunks = [self._apply_dtypes(clean(chunk.rename(columns=aliases)), schema['dtypes']) for chunk in reader]
+        return self._concat_chunks(chunks)
+    
+    @staticmethod
+    def _apply_dtypes(df, dtypes):
+        """Cast the cleaned columns listed in dtypes, leaving the rest as they are"""
+        for col, dtype in dtypes.items():
+            if col not in df.columns:
+                continue
+            if pd.api.types.is_integer_dtype(dtype):
+                # Out-of-range values saturate instead of wrapping around
+                df[col] = df[col].clip(upper=np.iinfo(dtype).max)
+            df[col] = df[col].astype(dtype)
+        return df
+    
+    @staticmethod
+    def _concat_chunks(chunks):
+        """Concatenate cleaned chunks, keeping categoricals whose chunks saw different values"""
+        if len(chunks) == 1:
+            return chunks[0]
+        
+        for col in chunks[0].columns:
+            if isinstance(chunks[0][col].dtype, pd.CategoricalDtype):
+                categories = union_categoricals([chunk[col] for chunk in chunks]).categories
+                for chunk in chunks:
+                    chunk[col] = chunk[col].cat.set_categories(categories)
+        return pd.concat(chunks)
+    
+    def catalogue_memory_report(self):
+        """Bytes of every column of the cleaned catalogues, as stored and as Python strings.
+        
+        Text columns also report object_bytes, their size as plain object strings, so
+        the saving from dictionary encoding shows per column; numeric columns count
+        the same either way.
+        """
+        report = {}
+        for kind, catalogue in self._catalogues.items():
+            df = catalogue.data
+            if df is None:
+                continue
+            columns = {}
+            for col in df.columns:
+                series = df[col]
+                stored = int(series.memory_usage(index=False, deep=True))
+                is_text = isinstance(series.dtype, pd.CategoricalDtype) or not pd.api.types.is_numeric_dtype(series)
+                unencoded = int(series.astype(object).memory_usage(index=False, deep=True)) if is_text else stored
+                columns[col] = {'dtype': str(series.dtype), 'bytes': stored, 'object_bytes': unencoded}
+            report[kind] = {
+                'rows': len(df),
+                'bytes': sum(column['bytes'] for column in columns.values()),
+                'object_bytes': sum(column['object_bytes'] for column in columns.values()),
+                'columns': columns
+            }
+        return report
+    
+    def _install_frames(self, frames, models=None):
+        """Swap in catalogues built from freshly loaded frames and, optionally, models.
+        
+        frames and models map a kind to its cleaned frame and to its model and
+        encoders ({'model': ..., 'le_location': ..., 'le_type': ...}); kinds left
+        out keep their current frame or model. Each new catalogue is indexed and
+        scored by its model before it is swapped in.
+        """
+        with self._update_lock:
+            catalogues = {}
+            for kind, catalogue in self._catalogues.items():
+                changes = dict((models or {}).get(kind, {}))
+                if kind in frames:
+                    changes.update(data=frames[kind], **self._catalogue_indexes(kind, frames[kind]))
+                if changes:
+                    catalogues[kind] = self._with_budget_probabilities(kind, catalogue.replace(**changes))
+            self._swap_catalogues(catalogues)
+    
+    def _swap_catalogues(self, catalogues):
+        """Make the given catalogues (by kind) current with one reference assignment"""
+        with self._update_lock:
+            self._catalogues = {**self._catalogues, **catalogues}
+            # Results ranked before the swap must not be served or cached; requests read
+            # the cache generation before the catalogues, so none can slip in between
+            self.result_cache.clear()
+    
+    def _catalogue_indexes(self, kind, df, text_index=None):
+        """Query-time indexes over one cleaned catalogue, keyed by Catalogue field;
+        text_index is used instead of fitting a new TextIndex when given
+        """
+        indexes = {'spatial_index': None, 'embedding_index': None}
+        if kind == 'restaurant':
+            indexes['index'] = CatalogueIndex(df, 'numeric_rate', cuisine_col='cuisines')
+            # Only some restaurant exports (e.g. the Bangalore chain listing) carry coordinates
+            if {'Latitude', 'Longitude'}.issubset(df.columns):
+                indexes['spatial_index'] = SpatialIndex(df['Latitude'], df['Longitude'])
+        else:
+            indexes['index'] = CatalogueIndex(df, 'numeric_rating')
+        indexes['text_index'] = text_index or TextIndex(clone(self.vectorizer), df['combined_features'])
+        if self.semantic_k:
+            indexes['embedding_index'] = EmbeddingIndex(
+                clone(self.vectorizer), self._combine_text_columns(df, EMBEDDING_COLUMNS[kind]))
+        return indexes
+    
+    def upsert_listings(self, kind, rows):
+        """Add or replace 'restaurant' or 'hotel' listings without reloading or retraining.
+        
+        rows are raw feed records: a DataFrame indexed by listing id (existing ids
+        are replaced), or dicts, which get new ids. Only these rows are cleaned and
+        scored by the budget model; the TF-IDF index is patched and the other
+        indexes are rebuilt from the patched frame. Updates live in memory only.
+        Returns the ids of the listings kept after cleaning.
+        """
+        schema, clean = self._catalogue_spec(kind)
+        with self._update_lock:
+            catalogue = self._catalogues[kind]
+            data = catalogue.data
+            if not isinstance(rows, pd.DataFrame):
+                rows = pd.DataFrame(list(rows))
+                start = int(data.index.max()) + 1 if data is not None and len(data) else 0
+                rows.index = pd.RangeIndex(start, start + len(rows))
+            rows = rows[~rows.index.duplicated(keep='last')].rename(columns=schema.get('aliases', {}))
             
-        print("Data preprocessing completed!")
+            # Clean the delta as a feed chunk: the feed's columns, all read as text with
+            # missing cells left NaN (astype alone spells them 'nan' before pandas 3)
+            columns = [col for col in schema['columns'] if data is None or col in data.columns]
+            raw = rows.reindex(columns=columns)
+            delta = self._apply_dtypes(clean(raw.astype('str').where(raw.notna())), schema['dtypes'])
+            probabilities = self._predict_budget_probability(kind, catalogue, delta)
+            if probabilities is not None:
+                delta['budget_probability'] = probabilities
+            
+            self._patch_catalogue(kind, catalogue, rows.index, delta)
+            return delta.index
+    
+    def remove_listings(self, kind, ids):
+        """Remove 'restaurant' or 'hotel' listings by id; returns how many were removed"""
+        self._catalogue_spec(kind)
+        with self._update_lock:
+            return self._patch_catalogue(kind, self._catalogues[kind], pd.Index(ids))
+    
+    def _catalogue_spec(self, kind):
+        """Feed schema and cleaning function of a catalogue kind"""
+        if kind == 'restaurant':
+            return RESTAURANT_SCHEMA, self._clean_restaurant_data
+        if kind == 'hotel':
+            return HOTEL_SCHEMA, self._clean_hotel_data
+        raise ValueError(f"Unknown catalogue {kind!r}, expected 'restaurant' or 'hotel'")
+    
+    def _patch_catalogue(self, kind, catalogue, removed_ids, delta=None):
+        """Swap in a copy of catalogue without the listings with removed_ids and with
+        the cleaned delta appended, its indexes patched; returns the number of listings dropped
+        """
+        data, text_index = catalogue.data, catalogue.text_index
+        if data is None:
+            if delta is None:
+                return 0
+            data, text_index = delta.iloc[:0], None
+        
+        removed = np.flatnonzero(data.index.isin(removed_ids))
+        kept = data.iloc[np.setdiff1d(np.arange(len(data)), removed)] if len(removed) else data.copy(deep=False)
+        if delta is not None and len(delta):
+            patched = self._concat_chunks([kept, delta.reindex(columns=data.columns)])
+            texts = delta['combined_features']
+        else:
+            patched, texts = kept, []
+        if text_index is not None:
+            text_index = text_index.patched(removed, texts)
+        
+        indexes = self._catalogue_indexes(kind, patched, text_index)
+        self._swap_catalogues({kind: catalogue.replace(data=patched, **indexes)})
+        
+        # The budget model keeps scoring new rows until enough of its catalogue has changed
+        self.pending_changes[kind] += len(removed) + (len(delta) if delta is not None else 0)
+        if (catalogue.model is not None
+                and self.pending_changes[kind] >= self.retrain_fraction * max(len(patched), 1)):
+            self._retrain_in_background()
+        return len(removed)
+    
+    def _retrain_in_background(self):
+        """Retrain the models on a daemon thread, unless a retrain is already running"""
+        if self._retrain_thread is not None and self._retrain_thread.is_alive():
+            return
+        
+        def retrain():
+            try:
+                self.train_models()
+            except Exception as e:
+                print(f"Error retraining models: {e}")
+        
+        self.pending_changes = {kind: 0 for kind in self.pending_changes}
+        self._retrain_thread = threading.Thread(target=retrain, name='recommender-retrain', daemon=True)
+        self._retrain_thread.start()
         
     def _clean_restaurant_data(self, df):
         """Clean and preprocess restaurant data"""
         # Clean rate column
         df['rate'] = df['rate'].astype(str)
-        df['numeric_rate'] = df['rate'].apply(self._extract_rating)
+        df['numeric_rate'] = parse_rating(df['rate'])
+        
+        # Clean cost column; exports without one (e.g. the Bangalore chain listing)
+        # keep their listings with an unknown cost, never classed as budget friendly
+        unknown_cost = 'approx_cost(for two people)' not in df.columns
+        if unknown_cost:
+            df['cost'] = ''
+            df['numeric_cost'] = np.nan
+        else:
+            df['cost'] = df['approx_cost(for two people)'].astype(str)
+            df['numeric_cost'] = parse_cost(df['cost'])
         
-        # Clean cost column
-        df['cost'] = df['approx_cost(for two people)'].astype(str)
-        df['numeric_cost'] = df['cost'].apply(self._extract_cost)
+        # Numeric columns are read as text
+        df['votes'] = pd.to_numeric(df['votes'], errors='coerce')
+        for col in ['Latitude', 'Longitude']:
+            if col in df.columns:
+                df[col] = pd.to_numeric(df[col], errors='coerce')
         
         # Detect city for each restaurant and create budget category
-        df['detected_city'] = df.apply(self._detect_restaurant_city, axis=1)
-        df['is_budget_friendly'] = df.apply(self._classify_restaurant_budget, axis=1)
+        df['detected_city'] = self._detect_restaurant_city(df)
+        df['is_budget_friendly'] = self._classify_restaurant_budget(df)
         
         # Clean text fields
-        df['cuisines'] = df['cuisines'].fillna('')
-        df['location'] = df['location'].fillna('')
-        df['rest_type'] = df['rest_type'].fillna('')
+        for col in ['cuisines', 'location', 'rest_type']:
+            df[col] = df[col].fillna('') if col in df.columns else ''
         
         # Create combined text features
         df['combined_features'] = (df['cuisines'] + ' ' + 
@@ -931,22 +1155,55 @@ class MultiCityRecommendationSystem:
                                  df['rest_type']).str.lower()
         
         # Remove rows with invalid data
-        df = df.dropna(subset=['numeric_rate', 'numeric_cost'])
-        df = df[df['numeric_cost'] > 0]
+        df = df.dropna(subset=['numeric_rate'])
+        if not unknown_cost:
+            df = df[df['numeric_cost'] > 0]
         
+        return self._precompute_restaurant_features(df)
+    
+    def _precompute_restaurant_features(self, df):
+        """Add the static per-listing score terms as float32 columns.
+        
+        Every city gets a specialty_bonus_<city> (0.3 per specialty cuisine
+        served, counted on the cuisine bitset) and chain_bonus_<city> column, so
+        query-time scoring gathers them instead of matching names and cuisines
+        per request.
+        """
+        specialties = {cuisine for info in self.city_data.values() for cuisine in info['cuisine_specialty']}
+        cuisines = CuisineBitset(df['cuisines'], specialties)
+        for city, info in self.city_data.items():
+            df[f'specialty_bonus_{city}'] = (cuisines.counts(info['cuisine_specialty']) * 0.3).astype(np.float32)
+            df[f'chain_bonus_{city}'] = self._keyword_bonus(df['name'], info['known_chains'], 0.2)
+        
+        votes = df['votes'].fillna(0).to_numpy(dtype=np.float32)
+        df['log_votes'] = np.log1p(votes)
         return df
+    
+    @staticmethod
+    def _keyword_bonus(series, keywords, weight):
+        """weight for each keyword a cell contains (case-insensitive) as float32,
+        matched on the distinct values only
+        """
+        codes, uniques = pd.factorize(series)
+        text = pd.Series(uniques, dtype=object).astype(str)
+        bonus = np.zeros(len(uniques) + 1)  # Missing cells (code -1) get the trailing 0
+        for keyword in keywords:
+            bonus[:-1] += text.str.contains(keyword, case=False, regex=False).to_numpy(dtype=bool) * weight
+        return bonus[codes].astype(np.float32)
         
     def _clean_hotel_data(self, df):
         """Clean and preprocess hotel data"""
         # Clean price column
-        df['numeric_price'] = df['price'].apply(self._extract_cost)
+        df['numeric_price'] = parse_cost(df['price'])
+        if 'taxes' in df.columns:
+            df['total_price'] = parse_total_price(df['price'], df['taxes'])
         
         # Clean ratings
-        df['numeric_rating'] = df['ratings'].apply(self._extract_rating)
+        df['numeric_rating'] = parse_rating(df['ratings'])
         
         # Detect city for each hotel and create budget category
-        df['detected_city'] = df.apply(self._detect_hotel_city, axis=1)
-        df['is_budget_friendly'] = df.apply(self._classify_hotel_budget, axis=1)
+        df['detected_city'] = self._detect_hotel_city(df)
+        df['is_budget_friendly'] = self._classify_hotel_budget(df)
         
         # Clean text fields
         df['location'] = df['location'].fillna('')
@@ -959,9 +1216,7 @@ class MultiCityRecommendationSystem:
                 df[col] = df[col].fillna('')
                 features.append(df[col])
         
-        df['combined_features'] = (df['location'] + ' ' + 
-                                 df['condition'] + ' ' + 
-                                 ' '.join(features)).str.lower()
+        df['combined_features'] = df['location'].str.cat([df['condition']] + features, sep=' ').str.lower()
         
         # Remove rows with invalid data
         df = df.dropna(subset=['numeric_price', 'numeric_rating'])
@@ -969,67 +1224,51 @@ class MultiCityRecommendationSystem:
         
         return df
         
-    def _extract_rating(self, rating_str):
-        """Extract numeric rating from string"""
-        if pd.isna(rating_str) or rating_str == 'nan':
-            return 3.0  # Default rating
-        
-        rating_str = str(rating_str).strip()
-        
-        # Extract number from rating string (e.g., "4.1/5" -> 4.1)
-        match = re.search(r'(\d+\.?\d*)', rating_str)
-        if match:
-            rating = float(match.group(1))
-            # Normalize to 5-point scale if needed
-            if rating > 5:
-                rating = rating / 2  # Assume 10-point scale
-            return min(max(rating, 0), 5)
-        
-        return 3.0  # Default rating
+    def train_models(self, n_jobs=-1, select_trees=False):
+        """Train ML models for budget classification.
         
-    def _extract_cost(self, cost_str):
-        """Extract numeric cost from string"""
-        if pd.isna(cost_str) or cost_str == 'nan':
-            return 0
-        
-        cost_str = str(cost_str).strip()
-        
-        # Remove commas and extract numbers
-        cost_str = cost_str.replace(',', '')
-        match = re.search(r'(\d+)', cost_str)
-        if match:
-            return int(match.group(1))
-        
-        return 0
-        
-    def train_models(self):
-        """Train ML models for budget classification"""
+        The restaurant and hotel forests are fitted concurrently, each on n_jobs
+        cores (-1: all). With select_trees, tree counts are chosen by out-of-bag
+        accuracy instead of the fixed DEFAULT_TREES. Returns the training report,
+        which is also kept as self.training_report.
+        """
         print("Training ML models...")
-        
-        if self.restaurant_data is not None and len(self.restaurant_data) > 0:
-            self._train_restaurant_model()
-            
-        if self.hotel_data is not None and len(self.hotel_data) > 0:
-            self._train_hotel_model()
-            
+        start = time.perf_counter()
+        
+        # Trained on the frames current now; listings patched in meanwhile are scored on install
+        catalogues = self._catalogues
+        trainers = {'restaurant': self._train_restaurant_model, 'hotel': self._train_hotel_model}
+        jobs = {}
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            for kind, train in trainers.items():
+                df = catalogues[kind].data
+                if df is not None and len(df) > 0:
+                    jobs[kind] = executor.submit(train, df, n_jobs, select_trees)
+            trained = {kind: job.result() for kind, job in jobs.items()}
+        trained = {kind: result for kind, result in trained.items() if result is not None}
+        
+        self.training_report = {
+            'wall_seconds': round(time.perf_counter() - start, 3),
+            'n_jobs': n_jobs,
+            'models': {kind: report for kind, (_, report) in trained.items()}
+        }
+        # Each model goes live together with its encoders and the probabilities it scores
+        with self._update_lock:
+            self._swap_catalogues({
+                kind: self._with_budget_probabilities(kind, self._catalogues[kind].replace(**fitted))
+                for kind, (fitted, _) in trained.items()
+            })
         print("Model training completed!")
+        return self.training_report
         
-    def _train_restaurant_model(self):
-        """Train restaurant budget classification model"""
-        df = self.restaurant_data.copy()
-        
-        # Prepare features
-        X = pd.DataFrame()
-        X['rating'] = df['numeric_rate']
-        X['cost'] = df['numeric_cost']
-        X['votes'] = pd.to_numeric(df['votes'], errors='coerce').fillna(0)
-        
-        # Encode categorical features
-        le_location = LabelEncoder()
-        le_type = LabelEncoder()
-        
-        X['location_encoded'] = le_location.fit_transform(df['location'].astype(str))
-        X['type_encoded'] = le_type.fit_transform(df['rest_type'].astype(str))
+    def _train_restaurant_model(self, df, n_jobs=-1, select_trees=False):
+        """Train restaurant budget classification model on df; returns the fitted model and
+        encoders (as Catalogue fields) with its training report, or None with too few rows
+        """
+        # Encode categorical features and prepare features
+        le_location = LabelEncoder().fit(df['location'].astype(str))
+        le_type = LabelEncoder().fit(df['rest_type'].astype(str))
+        X = self._restaurant_features(df, le_location, le_type)
         
         y = df['is_budget_friendly']
         
@@ -1037,28 +1276,24 @@ class MultiCityRecommendationSystem:
         if len(X) > 10:  # Ensure we have enough data
             X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
             
-            self.restaurant_model = RandomForestClassifier(n_estimators=100, random_state=42)
-            self.restaurant_model.fit(X_train, y_train)
+            start = time.perf_counter()
+            model = self._fit_forest(X_train, y_train, n_jobs, select_trees)
+            fit_seconds = time.perf_counter() - start
             
-            # Store encoders for future use
-            self.restaurant_le_location = le_location
-            self.restaurant_le_type = le_type
-            
-            print(f"Restaurant model accuracy: {self.restaurant_model.score(X_test, y_test):.3f}")
-        
-    def _train_hotel_model(self):
-        """Train hotel budget classification model"""
-        df = self.hotel_data.copy()
-        
-        # Prepare features
-        X = pd.DataFrame()
-        X['rating'] = df['numeric_rating']
-        X['price'] = df['numeric_price']
-        X['stars'] = pd.to_numeric(df['stars'], errors='coerce').fillna(3)
-        
-        # Encode location
-        le_location = LabelEncoder()
-        X['location_encoded'] = le_location.fit_transform(df['location'].astype(str))
+            accuracy = model.score(X_test, y_test)
+            print(f"Restaurant model accuracy: {accuracy:.3f}")
+            # The encoders are kept with the model they were fitted for
+            fitted = {'model': model, 'le_location': le_location, 'le_type': le_type}
+            return fitted, self._model_report(model, X.columns, fit_seconds, accuracy)
+        return None
+        
+    def _train_hotel_model(self, df, n_jobs=-1, select_trees=False):
+        """Train hotel budget classification model on df; returns the fitted model and
+        encoder (as Catalogue fields) with its training report, or None with too few rows
+        """
+        # Encode location and prepare features
+        le_location = LabelEncoder().fit(df['location'].astype(str))
+        X = self._hotel_features(df, le_location)
         
         y = df['is_budget_friendly']
         
@@ -1066,180 +1301,616 @@ class MultiCityRecommendationSystem:
         if len(X) > 10:  # Ensure we have enough data
             X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
             
-            self.hotel_model = RandomForestClassifier(n_estimators=100, random_state=42)
-            self.hotel_model.fit(X_train, y_train)
+            start = time.perf_counter()
+            model = self._fit_forest(X_train, y_train, n_jobs, select_trees)
+            fit_seconds = time.perf_counter() - start
+            
+            accuracy = model.score(X_test, y_test)
+            print(f"Hotel model accuracy: {accuracy:.3f}")
+            fitted = {'model': model, 'le_location': le_location}
+            return fitted, self._model_report(model, X.columns, fit_seconds, accuracy)
+        return None
+    
+    @staticmethod
+    def _fit_forest(X, y, n_jobs=-1, select_trees=False):
+        """Fit a budget RandomForestClassifier with out-of-bag scoring.
+        
+        With select_trees, the forest is grown TREE_STEP trees at a time (warm
+        start) and stops once the OOB accuracy plateaus or MAX_TREES is reached.
+        """
+        if not select_trees:
+            model = RandomForestClassifier(n_estimators=DEFAULT_TREES, oob_score=True, n_jobs=n_jobs, random_state=42)
+            return model.fit(X, y)
+        
+        model = RandomForestClassifier(n_estimators=MIN_TREES, oob_score=True, warm_start=True,
+                                       n_jobs=n_jobs, random_state=42)
+        model.fit(X, y)
+        best = model.oob_score_
+        while model.n_estimators < MAX_TREES:
+            model.set_params(n_estimators=model.n_estimators + TREE_STEP)
+            model.fit(X, y)
+            if model.oob_score_ - best < OOB_PLATEAU:
+                break
+            best = model.oob_score_
+        return model.set_params(warm_start=False)
+    
+    @staticmethod
+    def _model_report(model, feature_names, fit_seconds, accuracy):
+        """Fit time, tree count, OOB and held-out accuracy, feature importances and pickled size of a forest"""
+        return {
+            'fit_seconds': round(fit_seconds, 3),
+            'n_estimators': model.n_estimators,
+            'oob_score': round(float(model.oob_score_), 4),
+            'test_accuracy': round(float(accuracy), 4),
+            'feature_importances': dict(zip(feature_names, model.feature_importances_.round(4).tolist())),
+            'model_bytes': len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+        }
+    
+    def _restaurant_features(self, df, le_location, le_type):
+        """Restaurant model features, with locations and types encoded by the given encoders"""
+        X = pd.DataFrame(index=df.index)
+        X['rating'] = df['numeric_rate']
+        X['cost'] = df['numeric_cost']
+        X['votes'] = pd.to_numeric(df['votes'], errors='coerce').fillna(0)
+        X['location_encoded'] = self._encode_labels(le_location, df['location'])
+        X['type_encoded'] = self._encode_labels(le_type, df['rest_type'])
+        return X
+    
+    def _hotel_features(self, df, le_location):
+        """Hotel model features, with locations encoded by the given encoder"""
+        X = pd.DataFrame(index=df.index)
+        X['rating'] = df['numeric_rating']
+        X['price'] = df['numeric_price']
+        X['stars'] = pd.to_numeric(df['stars'], errors='coerce').fillna(3)
+        X['location_encoded'] = self._encode_labels(le_location, df['location'])
+        return X
+    
+    @staticmethod
+    def _encode_labels(encoder, values):
+        """LabelEncoder codes of values, with -1 for labels the encoder was not fitted on
+        (LabelEncoder.transform raises on those)
+        """
+        return pd.Categorical(values.astype(str), categories=encoder.classes_).codes.astype(np.int64)
+    
+    def _model_features(self, kind, catalogue, df):
+        """Model features of df's rows, encoded with the catalogue's fitted encoders"""
+        if kind == 'restaurant':
+            return self._restaurant_features(df, catalogue.le_location, catalogue.le_type)
+        return self._hotel_features(df, catalogue.le_location)
+    
+    def _predict_budget_probability(self, kind, catalogue, df):
+        """Probability that each row of df is budget friendly, from one batched
+        predict_proba call; None when the catalogue has no trained model
+        """
+        model = catalogue.model
+        return None if model is None else self._model_probability(kind, catalogue, model, df)
+    
+    def _model_probability(self, kind, catalogue, model, df):
+        """Budget probability of df's rows under model (a classifier or BudgetLookupTable),
+        with features encoded by the catalogue's encoders
+        """
+        if isinstance(model, BudgetLookupTable):
+            return model.budget_probability(df)
+        
+        X = self._model_features(kind, catalogue, df)
+        if len(X) == 0 or 1 not in model.classes_:
+            return np.zeros(len(X), dtype=np.float32)
+        probabilities = model.predict_proba(X)[:, list(model.classes_).index(1)]
+        return probabilities.astype(np.float32)
+    
+    def compact_models(self, method='forest', tolerance=ACCURACY_TOLERANCE, n_jobs=-1):
+        """Replace each trained model with a much smaller one for low-memory workers.
+        
+        method is 'forest' (few shallow trees), 'boosting' (gradient boosting
+        distilled from the forest) or 'lookup' (a (city, cost bucket) table of the
+        forest's probabilities). A compacted model is only kept when its held-out
+        accuracy is within tolerance of the original's. Returns the compaction
+        report, also stored in training_report.
+        """
+        if method not in COMPACTION_METHODS:
+            raise ValueError(f"Unknown compaction method {method!r}, expected one of {COMPACTION_METHODS}")
+        
+        print(f"Compacting models ({method})...")
+        report = {'method': method, 'tolerance': tolerance, 'models': {}}
+        catalogues = self._catalogues
+        compacted = {}
+        for kind, catalogue in catalogues.items():
+            model = catalogue.model
+            if model is None:
+                continue
+            df = catalogue.data
+            labels = df['is_budget_friendly'].to_numpy()
+            
+            # The same held-out rows _train_*_model scored the original on
+            train, test = train_test_split(np.arange(len(df)), test_size=0.2, random_state=42)
+            if method == 'forest':
+                compact = compact_forest(self._model_features(kind, catalogue, df.iloc[train]), labels[train], n_jobs)
+            elif method == 'boosting':
+                # Any current model can teach, including an earlier lookup table
+                teacher_labels = (self._model_probability(kind, catalogue, model, df.iloc[train]) > 0.5).astype(np.int8)
+                compact = distill_boosting(self._model_features(kind, catalogue, df.iloc[train]), teacher_labels)
+            else:
+                cost_col, bucket_width = LOOKUP_COSTS[kind]
+                compact = BudgetLookupTable(cost_col, bucket_width).fit(
+                    df['detected_city'].iloc[train], df[cost_col].iloc[train],
+                    self._model_probability(kind, catalogue, model, df.iloc[train]))
             
-            # Store encoder for future use
-            self.hotel_le_location = le_location
+            accuracy = self._budget_accuracy(kind, catalogue, model, df.iloc[test], labels[test])
+            compact_accuracy = self._budget_accuracy(kind, catalogue, compact, df.iloc[test], labels[test])
+            kept = accuracy - compact_accuracy <= tolerance
+            if kept:
+                compacted[kind] = compact
             
-            print(f"Hotel model accuracy: {self.hotel_model.score(X_test, y_test):.3f}")
+            report['models'][kind] = {
+                'accuracy': round(accuracy, 4),
+                'compact_accuracy': round(compact_accuracy, 4),
+                'model_bytes': pickled_size(model),
+                'compact_model_bytes': pickled_size(compact),
+                'kept': kept
+            }
+            status = "kept" if kept else "rejected, keeping the original"
+            print(f"{kind.title()} model: {pickled_size(model):,} -> {pickled_size(compact):,} bytes, "
+                  f"accuracy {accuracy:.3f} -> {compact_accuracy:.3f} ({status})")
+        
+        self.training_report = dict(self.training_report or {}, compaction=report)
+        with self._update_lock:
+            # A model retrained meanwhile is newer than the one compacted, so it stays
+            self._swap_catalogues({
+                kind: self._with_budget_probabilities(kind, self._catalogues[kind].replace(model=compact))
+                for kind, compact in compacted.items()
+                if self._catalogues[kind].model is catalogues[kind].model
+            })
+        return report
+    
+    def _budget_accuracy(self, kind, catalogue, model, df, labels):
+        """Fraction of df's rows whose budget label model predicts (probability above 0.5)"""
+        if len(df) == 0:
+            return 1.0
+        predicted = self._model_probability(kind, catalogue, model, df) > 0.5
+        return float(np.mean(predicted == (labels == 1)))
+    
+    def _with_budget_probabilities(self, kind, catalogue):
+        """Copy of catalogue whose frame carries its model's budget probabilities as a
+        budget_probability column, so ranking uses them without any per-request model calls
+        """
+        df = catalogue.data
+        if df is None:
+            return catalogue
+        probabilities = self._predict_budget_probability(kind, catalogue, df)
+        if probabilities is not None:
+            return catalogue.replace(data=df.assign(budget_probability=probabilities))
+        if 'budget_probability' in df.columns:
+            return catalogue.replace(data=df.drop(columns='budget_probability'))
+        return catalogue
+    
+    def _data_fingerprint(self):
+        """Fingerprint the source CSVs and library versions a snapshot depends on"""
+        fingerprint = {
+            'snapshot_version': SNAPSHOT_VERSION,
+            'pandas': pd.__version__,
+            'sklearn': sklearn.__version__
+        }
+        
+        for kind, path in self.data_paths.items():
+            try:
+                fingerprint[kind] = file_sha256(path)
+            except OSError:
+                fingerprint[kind] = None  # Missing source is part of the key too
+        
+        return fingerprint
     
-    def get_recommendations(self, user_query, num_recommendations=10):
-        """Get recommendations based on user query with city and preference support"""
-        user_query = user_query.lower().strip()
+    def save_snapshot(self, path=DEFAULT_SNAPSHOT_PATH, compress=False):
+        """Persist fitted models and encoders (and the cleaned data when there is no
+        catalogue cache) keyed on the source data; compress writes it gzipped
+        """
+        attributes = self.SNAPSHOT_ATTRIBUTES
+        if not self.catalogue_cache:
+            attributes += self.CATALOGUE_ATTRIBUTES
+        state = {attr: getattr(self, attr, None) for attr in attributes}
+        
+        # Write next to the target and rename, so concurrent workers never read a partial file
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with (gzip.open if compress else open)(tmp_path, 'wb') as f:
+            pickle.dump(self._data_fingerprint(), f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        
+        print(f"Snapshot saved to {path}")
+    
+    def load_snapshot(self, path=DEFAULT_SNAPSHOT_PATH):
+        """Restore a snapshot written by save_snapshot; returns False if missing or stale.
         
-        # Detect city and extract preferences
-        detected_city = self.detect_city_from_query(user_query)
-        preferences = self.extract_preferences(user_query)
+        Snapshots are pickles, so only load files this system wrote itself.
+        """
+        if not os.path.exists(path):
+            return False
         
-        # Determine if user wants restaurants or hotels
-        restaurant_keywords = ['restaurant', 'food', 'eat', 'dining', 'cuisine', 'meal', 'lunch', 'dinner', 'breakfast']
-        hotel_keywords = ['hotel', 'stay', 'accommodation', 'room', 'lodge', 'guest', 'night']
+        try:
+            with self._open_snapshot(path) as f:
+                # The fingerprint is stored first so stale snapshots are rejected
+                # without unpickling the (large) frames and models behind it
+                if pickle.load(f) != self._data_fingerprint():
+                    print(f"Snapshot {path} is stale, ignoring it")
+                    return False
+                state = pickle.load(f)
+        except Exception as e:
+            print(f"Error loading snapshot: {e}")
+            return False
         
-        wants_restaurants = any(keyword in user_query for keyword in restaurant_keywords)
-        wants_hotels = any(keyword in user_query for keyword in hotel_keywords)
+        self.training_report = state.get('training_report')
+        models = {
+            kind: {field: state.get(f'{kind}_{field}') for field in ('model', 'le_location', 'le_type')}
+            for kind in self._catalogues
+        }
+        if all(attr in state for attr in self.CATALOGUE_ATTRIBUTES):
+            frames = {kind: state[f'{kind}_data'] for kind in self._catalogues if state[f'{kind}_data'] is not None}
+        else:
+            # Frames live in the memory-mapped catalogue cache, shared across workers
+            frames = self._load_frames()
+        self._install_frames(frames, models)
         
-        # If neither specified, provide both
-        if not wants_restaurants and not wants_hotels:
-            wants_restaurants = wants_hotels = True
+        print(f"Loaded snapshot from {path}")
+        return True
+    
+    @staticmethod
+    def _open_snapshot(path):
+        """Open a snapshot for reading, gzipped or not"""
+        with open(path, 'rb') as f:
+            gzipped = f.read(2) == b'\x1f\x8b'
+        return gzip.open(path, 'rb') if gzipped else open(path, 'rb')
+    
+    def load_or_train(self, snapshot_path=DEFAULT_SNAPSHOT_PATH, compact=None):
+        """Start warm from a snapshot, rebuilding and re-saving it only when the data changed.
+        
+        compact names a compact_models method to apply after retraining; the
+        snapshot is then also written compressed.
+        """
+        if self.load_snapshot(snapshot_path):
+            return
+        
+        self.load_and_preprocess_data()
+        self.train_models()
+        if compact:
+            self.compact_models(compact)
+        
+        try:
+            self.save_snapshot(snapshot_path, compress=bool(compact))
+        except OSError as e:
+            print(f"Error saving snapshot: {e}")
+    
+    def _query_signature(self, parsed):
+        """Hashable key of everything in a parsed query that the results depend on"""
+        preferences = tuple(
+            (key, tuple(value) if isinstance(value, list) else value)
+            for key, value in sorted(parsed['preferences'].items())
+        )
+        # The raw text only matters through whether it names a city and its TF-IDF terms
+        return (parsed['city'], parsed['names_city'], parsed['wants_restaurants'], parsed['wants_hotels'], preferences,
+                parsed['text_terms'], parsed.get('location'), parsed.get('radius_km'))
+    
+    def _parse_query(self, user_query):
+        """Parse a query and attach its TF-IDF terms"""
+        parsed = self.query_parser.parse(user_query)
+        parsed['text_terms'] = self._text_terms(parsed['query'])
+        return parsed
+    
+    def _text_terms(self, text):
+        """Sorted tokens of text in either catalogue's TF-IDF vocabulary (repeats kept).
+        
+        Intent words ('food', 'hotels', ...) only choose the catalogue, so they are left out.
+        """
+        indexes = [catalogue.text_index for catalogue in self._catalogues.values()
+                   if catalogue.text_index is not None and catalogue.text_index.vocabulary]
+        if not indexes:
+            return ()
+        return tuple(sorted(token for token in indexes[0].analyzer(text)
+                            if token not in INTENT_WORDS and token.rstrip('s') not in INTENT_WORDS
+                            and any(token in index.vocabulary for index in indexes)))
+    
+    def get_recommendations(self, user_query, num_recommendations=10, location=None, radius_km=DEFAULT_SEARCH_RADIUS_KM):
+        """Get recommendations based on user query with city and preference support.
+        
+        Passing location=(latitude, longitude) limits restaurants to those within
+        radius_km and ranks nearer ones higher; hotels carry no coordinates and
+        are ranked as usual.
+        """
+        parsed = self._parse_query(user_query)
+        if location is not None:
+            parsed['location'] = (float(location[0]), float(location[1]))
+            parsed['radius_km'] = radius_km
+        recommendations = self._cached_recommendations(parsed, num_recommendations)
+        return recommendations, parsed['city'], parsed['preferences']
+    
+    def nearest_restaurants(self, latitude, longitude, k=10):
+        """The k restaurants closest to a point, nearest first"""
+        catalogue = self._catalogues['restaurant']
+        if catalogue.spatial_index is None:
+            return []
+        
+        rows, distances = catalogue.spatial_index.nearest(latitude, longitude, k)
+        return self._format_restaurants(catalogue.data.iloc[rows], distances)
+    
+    def get_recommendations_batch(self, queries, num_recommendations=10):
+        """Get recommendations for many queries at once.
+        
+        All queries are parsed first and grouped by city and preferences; each
+        group is ranked once, with full-catalogue scores shared between groups
+        of the same city. Returns one (recommendations, city, preferences)
+        tuple per query, in order, as get_recommendations would.
+        """
+        parsed_queries = [self._parse_query(query) for query in queries]
+        
+        score_cache = {}
+        group_results = {}
+        results = []
+        for parsed in parsed_queries:
+            key = self._query_signature(parsed)
+            if key not in group_results:
+                group_results[key] = self._cached_recommendations(parsed, num_recommendations, score_cache, copy=False)
             
+            # Fan out copies so callers can't mutate results shared with other queries
+            recommendations = [dict(rec) for rec in group_results[key]]
+            results.append((recommendations, parsed['city'], parsed['preferences']))
+        
+        return results
+    
+    def _cached_recommendations(self, parsed, num_recommendations, score_cache=None, copy=True):
+        """Ranked results for a parsed query, served from the result cache when present.
+        
+        Paraphrases share entries, since the key is the parsed query's signature
+        and K. Unless copy is False, callers get their own copies of the cached dicts.
+        """
+        key = (self._query_signature(parsed), num_recommendations)
+        recommendations = self.result_cache.get(key)
+        if recommendations is None:
+            generation = self.result_cache.generation
+            recommendations = self._recommend(parsed, num_recommendations, score_cache)[0]
+            self.result_cache.put(key, recommendations, generation)
+        return [dict(rec) for rec in recommendations] if copy else recommendations
+    
+    def _recommend(self, parsed, num_recommendations, score_cache=None):
+        """Rank both catalogues for a parsed query"""
+        wants_restaurants = parsed['wants_restaurants']
+        wants_hotels = parsed['wants_hotels']
+        # Read once, so the whole request sees one consistent frame, index and model per catalogue
+        catalogues = self._catalogues
+        restaurants, hotels = catalogues['restaurant'], catalogues['hotel']
+        
         recommendations = []
         
-        if wants_restaurants and self.restaurant_data is not None:
-            restaurant_recs = self._get_restaurant_recommendations(user_query, detected_city, preferences, num_recommendations//2 if wants_hotels else num_recommendations)
+        if wants_restaurants and restaurants.data is not None:
+            restaurant_recs = self._get_restaurant_recommendations(restaurants, parsed, num_recommendations//2 if wants_hotels else num_recommendations, score_cache)
             recommendations.extend(restaurant_recs)
             
-        if wants_hotels and self.hotel_data is not None:
-            hotel_recs = self._get_hotel_recommendations(user_query, detected_city, preferences, num_recommendations//2 if wants_restaurants else num_recommendations)
+        if wants_hotels and hotels.data is not None:
+            hotel_recs = self._get_hotel_recommendations(hotels, parsed, num_recommendations//2 if wants_restaurants else num_recommendations, score_cache)
             recommendations.extend(hotel_recs)
             
-        return recommendations, detected_city, preferences
+        return recommendations, parsed['city'], parsed['preferences']
+    
+    def _candidate_scores(self, kind, catalogue, rows, parsed, score_cache=None):
+        """Score candidate rows of catalogue, reusing full-catalogue scores from score_cache when given.
         
-    def _get_restaurant_recommendations(self, query, detected_city, preferences, num_recs):
+        The query's TF-IDF similarity to each listing is blended in on top.
+        """
+        preferences, city = parsed['preferences'], parsed['city']
+        calculate = self._calculate_restaurant_score if kind == 'restaurant' else self._calculate_hotel_score
+        data, text_index = catalogue.data, catalogue.text_index
+        
+        if score_cache is None:
+            scores = calculate(data, preferences, city, rows)
+        else:
+            # Scores are per-row and only depend on the city and budget_only, so a
+            # batch scores the whole catalogue once per combination and gathers; keying on
+            # the catalogue itself keeps scores from before a swap out of later groups
+            key = (catalogue, city, preferences['budget_only'])
+            if key not in score_cache:
+                score_cache[key] = calculate(data, preferences, city)
+            scores = score_cache[key][rows]
+        
+        text_scores = text_index.scores(parsed['text_terms'], rows) if text_index is not None else None
+        if text_scores is not None:
+            scores += TEXT_MATCH_WEIGHT * text_scores
+        return scores
+    
+    def _semantic_candidates(self, embedding_index, parsed, within=None):
+        """Rows of the listings nearest the query in embedding space, narrowed to within.
+        
+        Returns within unchanged when semantic search is off or the query has no known terms.
+        """
+        if embedding_index is None:
+            return within
+        rows = embedding_index.rows_near(parsed['text_terms'], self.semantic_k)
+        if rows is None:
+            return within
+        if within is None:
+            return rows
+        small, large = sorted((rows, within), key=len)
+        return CatalogueIndex._intersect_sorted(small, large)
+    
+    def _get_restaurant_recommendations(self, catalogue, parsed, num_recs, score_cache=None):
         """Get restaurant recommendations based on city and preferences"""
-        df = self.restaurant_data.copy()
+        detected_city = parsed['city']
+        preferences = parsed['preferences']
         
         # Filter by city if specific city detected
-        if detected_city != 'bangalore' or any(city in query for city in self.city_data.keys()):
-            df = df[df['detected_city'] == detected_city]
-        
-        # Apply budget filter based on preferences
-        if preferences['budget_only']:
-            df = df[df['is_budget_friendly'] == 1]
-        elif not preferences['show_premium']:
-            # Show both budget and mid-range, but prioritize budget
-            pass
-        
-        # Filter by rating if specified
-        if preferences['rating_min'] > 0:
-            df = df[df['numeric_rate'] >= preferences['rating_min']]
-        
-        # Filter by cuisine preferences
-        if preferences['cuisine']:
-            cuisine_filter = df['cuisines'].str.lower().str.contains('|'.join(preferences['cuisine']), na=False, case=False)
-            df = df[cuisine_filter]
-        
-        if len(df) == 0:
+        city_filter = None
+        if detected_city != 'bangalore' or parsed['names_city']:
+            city_filter = detected_city
+        
+        # Location queries only consider restaurants within the radius
+        nearby_rows = nearby_distances = None
+        if 'location' in parsed:
+            if catalogue.spatial_index is None:
+                return []
+            nearby_rows, nearby_distances = catalogue.spatial_index.within_radius(*parsed['location'], parsed['radius_km'])
+        
+        # Budget, rating and cuisine filters come from the precomputed posting lists;
+        # without budget_only, both budget and mid-range are shown but budget is prioritised
+        rows = catalogue.index.candidates(
+            city=city_filter,
+            budget_only=preferences['budget_only'],
+            rating_min=preferences['rating_min'],
+            cuisines=preferences['cuisine'],
+            within=self._semantic_candidates(catalogue.embedding_index, parsed, nearby_rows)
+        )
+        
+        if len(rows) == 0:
             return []
         
         # Create scoring based on preferences and city
-        df = df.copy()
-        df['score'] = self._calculate_restaurant_score(df, preferences, detected_city)
+        scores = self._candidate_scores('restaurant', catalogue, rows, parsed, score_cache)
+        
+        # Nearer restaurants rank higher
+        distances = None
+        if nearby_rows is not None:
+            distances = nearby_distances[np.searchsorted(nearby_rows, rows)]
+            scores -= distances * DISTANCE_PENALTY_PER_KM
         
         # Remove duplicates based on restaurant name and get diverse recommendations
-        df = self._get_diverse_restaurants(df, num_recs)
+        selected = self._get_diverse_rows(scores, catalogue.index.name_keys[rows], num_recs)
+        df = catalogue.data.iloc[rows[selected]]
         
+        return self._format_restaurants(df, None if distances is None else distances[selected])
+    
+    def _format_restaurants(self, df, distances=None):
+        """Turn selected restaurant rows into recommendation dicts"""
         recommendations = []
-        for _, row in df.iterrows():
+        for i, (_, row) in enumerate(df.iterrows()):
             rec = {
                 'type': 'Restaurant',
                 'name': row['name'],
                 'location': row['location'],
                 'city': row['detected_city'].title(),
                 'rating': f"{row['numeric_rate']}/5",
-                'cost': f"Rs {row['numeric_cost']} for two",
+                'cost': f"Rs {row['numeric_cost']:.0f} for two" if pd.notna(row['numeric_cost']) else 'Not listed',
                 'cuisine': row['cuisines'],
                 'budget_friendly': bool(row['is_budget_friendly'])
             }
+            if distances is not None:
+                rec['distance'] = f"{distances[i]:.1f} km"
             recommendations.append(rec)
             
         return recommendations
     
-    def _calculate_restaurant_score(self, df, preferences, city):
-        """Calculate score for restaurants based on preferences"""
-        scores = df['numeric_rate'] * 2  # Base score from rating
+    @staticmethod
+    def _gather(df, col, rows=None):
+        """One column taken at rows (positions) when given, without copying the rest of the frame"""
+        column = df[col]
+        return column if rows is None else column.iloc[rows]
+    
+    @staticmethod
+    def _gather_values(df, col, rows=None):
+        """One numeric column at rows as a NumPy array (no index is built)"""
+        values = df[col].to_numpy()
+        return values if rows is None else values[rows]
+    
+    @classmethod
+    def _gather_numeric(cls, df, col, rows=None, fill_value=0):
+        """One column at rows as a float array, parsing non-numeric values to fill_value"""
+        if pd.api.types.is_numeric_dtype(df[col]):
+            # A gather is already a private copy; the full column must not be written to
+            values = cls._gather_values(df, col, rows).astype(float, copy=rows is None)
+        else:
+            values = np.array(pd.to_numeric(cls._gather(df, col, rows), errors='coerce'), dtype=float)
+        values[np.isnan(values)] = fill_value
+        return values
+    
+    @staticmethod
+    def _budget_score_column(df):
+        """The model's soft budget score when it has been applied, else the 0/1 threshold label"""
+        return 'budget_probability' if 'budget_probability' in df.columns else 'is_budget_friendly'
+    
+    def _calculate_restaurant_score(self, df, preferences, city, rows=None):
+        """Calculate score for restaurants based on preferences.
+        
+        Scores the given row positions of df (all rows when None) into a new
+        float array, reading only the columns involved.
+        """
+        scores = self._gather_values(df, 'numeric_rate', rows) * 2.0  # Base score from rating
         
         # Budget bonus
         if preferences['budget_only']:
-            scores += df['is_budget_friendly'] * 1
+            scores += self._gather_values(df, self._budget_score_column(df), rows)
         else:
             # Slight penalty for expensive places if not explicitly asking for premium
             city_threshold = self.city_data[city]['budget_threshold_restaurant']
-            scores -= (df['numeric_cost'] > city_threshold * 2) * 0.5
-        
-        # City specialty bonus
-        city_cuisines = self.city_data[city]['cuisine_specialty']
-        for specialty in city_cuisines:
-            cuisine_match = df['cuisines'].str.lower().str.contains(specialty, na=False, case=False)
-            scores += cuisine_match * 0.3
-        
-        # Known chain bonus
-        known_chains = self.city_data[city]['known_chains']
-        for chain in known_chains:
-            chain_match = df['name'].str.lower().str.contains(chain, na=False, case=False)
-            scores += chain_match * 0.2
+            scores -= (self._gather_values(df, 'numeric_cost', rows) > city_threshold * 2) * 0.5
         
-        # Vote count bonus (popularity)
-        votes = pd.to_numeric(df['votes'], errors='coerce').fillna(0)
-        scores += np.log1p(votes) * 0.1
+        # City specialty, known chain and popularity bonuses, precomputed at load time
+        scores += self._gather_values(df, f'specialty_bonus_{city}', rows)
+        scores += self._gather_values(df, f'chain_bonus_{city}', rows)
+        scores += self._gather_values(df, 'log_votes', rows) * 0.1
         
         return scores
     
-    def _get_diverse_restaurants(self, df, num_recs):
-        """Get diverse restaurant recommendations by avoiding duplicates and ensuring variety"""
-        # Sort by score first
-        df = df.sort_values('score', ascending=False)
-        
-        selected_restaurants = []
-        seen_names = set()
-        
-        # Get unique restaurants without duplicates
-        for _, row in df.iterrows():
-            if len(selected_restaurants) >= num_recs:
-                break
+    def _get_diverse_rows(self, scores, name_keys, num_recs):
+        """Positions of the num_recs best scored rows, skipping repeated names.
+        
+        Uses a partial selection instead of sorting every candidate: only rows
+        scoring at least the m-th best are ordered (score descending, then
+        catalogue order), and m doubles only while duplicates leave fewer
+        than num_recs distinct names. scores is a per-request scratch buffer
+        and is modified in place.
+        """
+        n = len(scores)
+        if n == 0 or num_recs <= 0:
+            return np.array([], dtype=np.int64)
+        
+        # NaN scores rank last, as with sort_values
+        scores[np.isnan(scores)] = -np.inf
+        
+        m = min(n, 2 * num_recs)
+        while True:
+            if m < n:
+                threshold = np.partition(scores, n - m)[n - m]
+                top = np.flatnonzero(scores >= threshold)  # keeps every row tied at the threshold
+            else:
+                top = np.arange(n)
+            top = top[np.lexsort((top, -scores[top]))]
             
-            name = row['name'].lower().strip()
+            selected = []
+            seen_names = set()
+            for pos in top:
+                name = name_keys[pos]
+                if name in seen_names:
+                    continue
+                selected.append(pos)
+                seen_names.add(name)
+                if len(selected) >= num_recs:
+                    return np.array(selected, dtype=np.int64)
             
-            # Skip if we've seen this exact name
-            if name in seen_names:
-                continue
-            
-            selected_restaurants.append(row)
-            seen_names.add(name)
-        
-        # Convert back to DataFrame
-        if selected_restaurants:
-            return pd.DataFrame(selected_restaurants).reset_index(drop=True)
-        else:
-            return df.head(0)  # Empty DataFrame
-        
-    def _get_hotel_recommendations(self, query, detected_city, preferences, num_recs):
+            if len(top) == n:
+                return np.array(selected, dtype=np.int64)
+            m = min(n, m * 2)
+    
+    def _get_hotel_recommendations(self, catalogue, parsed, num_recs, score_cache=None):
         """Get hotel recommendations based on city and preferences"""
-        df = self.hotel_data.copy()
+        detected_city = parsed['city']
+        preferences = parsed['preferences']
         
         # Filter by city if specific city detected
-        if detected_city != 'bangalore' or any(city in query for city in self.city_data.keys()):
-            df = df[df['detected_city'] == detected_city]
-        
-        # Apply budget filter based on preferences
-        if preferences['budget_only']:
-            df = df[df['is_budget_friendly'] == 1]
-        elif not preferences['show_premium']:
-            pass  # Show all price ranges but prioritize budget
-        
-        # Filter by rating if specified
-        if preferences['rating_min'] > 0:
-            df = df[df['numeric_rating'] >= preferences['rating_min']]
-        
-        if len(df) == 0:
+        city_filter = None
+        if detected_city != 'bangalore' or parsed['names_city']:
+            city_filter = detected_city
+        
+        # Show all price ranges unless budget_only, but prioritize budget
+        rows = catalogue.index.candidates(
+            city=city_filter,
+            budget_only=preferences['budget_only'],
+            rating_min=preferences['rating_min'],
+            within=self._semantic_candidates(catalogue.embedding_index, parsed)
+        )
+        
+        if len(rows) == 0:
             return []
         
         # Calculate scores
-        df = df.copy()
-        df['score'] = self._calculate_hotel_score(df, preferences, detected_city)
+        scores = self._candidate_scores('hotel', catalogue, rows, parsed, score_cache)
         
         # Remove duplicates and get diverse recommendations
-        df = self._get_diverse_hotels(df, num_recs)
+        selected = self._get_diverse_rows(scores, catalogue.index.name_keys[rows], num_recs)
+        df = catalogue.data.iloc[rows[selected]]
         
         recommendations = []
         for _, row in df.iterrows():
@@ -1257,65 +1928,23 @@ class MultiCityRecommendationSystem:
             
         return recommendations
     
-    def _calculate_hotel_score(self, df, preferences, city):
-        """Calculate score for hotels based on preferences"""
-        scores = df['numeric_rating'] * 2  # Base score from rating
+    def _calculate_hotel_score(self, df, preferences, city, rows=None):
+        """Calculate score for hotels based on preferences (row positions of df, or all rows)"""
+        scores = self._gather_values(df, 'numeric_rating', rows) * 2.0  # Base score from rating
         
         # Budget bonus
         if preferences['budget_only']:
-            scores += df['is_budget_friendly'] * 1
+            scores += self._gather_values(df, self._budget_score_column(df), rows)
         else:
             city_threshold = self.city_data[city]['budget_threshold_hotel']
-            scores -= (df['numeric_price'] > city_threshold * 2) * 0.5
+            scores -= (self._gather_values(df, 'numeric_price', rows) > city_threshold * 2) * 0.5
         
         # Star rating bonus
-        stars = pd.to_numeric(df['stars'], errors='coerce').fillna(3)
+        stars = self._gather_numeric(df, 'stars', rows, fill_value=3)
         scores += stars * 0.2
         
         return scores
     
-    def _get_diverse_hotels(self, df, num_recs):
-        """Get diverse hotel recommendations by avoiding duplicates"""
-        # Sort by score first
-        df = df.sort_values('score', ascending=False)
-        
-        selected_hotels = []
-        seen_names = set()
-        seen_locations = set()
-        
-        for _, row in df.iterrows():
-            if len(selected_hotels) >= num_recs:
-                break
-            
-            name = row['name'].lower().strip()
-            location = row['location'].lower().strip()
-            
-            # Skip exact duplicate names
-            if name in seen_names:
-                continue
-            
-            # Add the hotel
-            selected_hotels.append(row)
-            seen_names.add(name)
-            seen_locations.add(location)
-        
-        # If we don't have enough diverse hotels, fill with remaining ones
-        if len(selected_hotels) < num_recs:
-            for _, row in df.iterrows():
-                if len(selected_hotels) >= num_recs:
-                    break
-                
-                name = row['name'].lower().strip()
-                if name not in seen_names:
-                    selected_hotels.append(row)
-                    seen_names.add(name)
-        
-        # Convert back to DataFrame
-        if selected_hotels:
-            return pd.DataFrame(selected_hotels).reset_index(drop=True)
-        else:
-            return df.head(0)  # Empty DataFrame
-    
     def print_recommendations(self, recommendations, detected_city=None, preferences=None):
         """Print recommendations with city and preference information"""
         if not recommendations:
@@ -1336,6 +1965,8 @@ class MultiCityRecommendationSystem:
             if 'city' in rec:
                 print(f"   City: {rec['city']}")
             print(f"   Rating: {rec['rating']}")
+            if 'distance' in rec:
+                print(f"   Distance: {rec['distance']}")
             
             if rec['type'] == 'Restaurant':
                 print(f"   Cost: {rec['cost']}")
@@ -1356,11 +1987,8 @@ def main():
     # Initialize system
     system = MultiCityRecommendationSystem()
     
-    # Load and process data
-    system.load_and_preprocess_data()
-    
-    # Train models
-    system.train_models()
+    # Load data and models, reusing the snapshot when the CSVs are unchanged
+    system.load_or_train()
     
     print("\nSystem ready! Ask for recommendations with preferences and locations.")
     print("Examples:")
@@ -1394,5 +2022,4 @@ def main():
             print(f"An error occurred: {e}")
 
 if __name__ == "__main__":
->>>>>>> 708c1ae66dcd2c85dcd39a822a0ef366099f4220
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Columnar Parsing
+================
+Vectorized parsers for the free-text numeric columns in the restaurant and
+hotel feeds (`4.1/5`, `₹892`, `(2303 Ratings)`, `+ ₹157 taxes & fees`).
+Each takes and returns a whole Series. Feeds repeat the same few hundred
+strings, so only the distinct values are parsed and the results are
+broadcast back with one take.
+"""
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_RATING = 3.0
+MAX_RATING = 5.0
+
+def _parse_distinct(series, parse, missing):
+    """Apply a Series -> ndarray parser to the distinct values of series only"""
+    codes, uniques = pd.factorize(series)
+    parsed = np.append(parse(pd.Series(uniques, dtype=object).astype(str)), missing)
+    # Missing cells have code -1, which picks the appended value
+    return pd.Series(parsed[codes], index=series.index)
+
+def _ratings(text):
+    """Rating parser for a Series of distinct strings"""
+    number = text.str.extract(r'(\d+\.?\d*)', expand=False)
+    rating = pd.to_numeric(number, errors='coerce')
+    rating = rating.where(rating <= MAX_RATING, rating / 2).clip(0, MAX_RATING)
+    return rating.fillna(DEFAULT_RATING).to_numpy(dtype=float)
+
+def _costs(text):
+    """Cost parser for a Series of distinct strings"""
+    number = text.str.replace(',', '', regex=False).str.extract(r'(\d+)', expand=False)
+    return pd.to_numeric(number, errors='coerce').fillna(0).to_numpy(dtype=np.int64)
+
+def parse_rating(series):
+    """Ratings on a 5-point scale: the first number in each cell, halved above 5
+    (assumed 10-point) and clipped to 0-5; missing or number-less cells get 3.0
+    """
+    return _parse_distinct(series, _ratings, DEFAULT_RATING)
+
+def parse_cost(series):
+    """Whole rupee amounts: the first integer in each cell after dropping
+    thousands separators; missing or number-less cells are 0
+    """
+    return _parse_distinct(series, _costs, 0)
+
+def parse_total_price(price, taxes):
+    """Room price plus taxes and fees, both parsed with parse_cost"""
+    return parse_cost(price) + parse_cost(taxes)
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Model Compaction
+================
+Smaller stand-ins for the budget RandomForest models, for workers that keep
+every model in memory.
+
+- `compact_forest`: fewer trees with capped depth and leaf counts.
+- `distill_boosting`: a shallow HistGradientBoostingClassifier fitted to the
+  current model's predicted labels; its thresholds are quantized to at most 255
+  bins per feature.
+- `BudgetLookupTable`: the forest's mean budget probability per (city, cost bucket).
+"""
+
+import pickle
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier
+
+COMPACT_TREES = 30
+COMPACT_MAX_DEPTH = 10
+COMPACT_MAX_LEAF_NODES = 128
+DISTILLED_ITERATIONS = 50
+DISTILLED_MAX_DEPTH = 4
+ACCURACY_TOLERANCE = 0.01  # Largest held-out accuracy a compacted model may lose
+
+def compact_forest(X, y, n_jobs=-1, random_state=42):
+    """Small, shallow RandomForestClassifier fitted on the training labels"""
+    model = RandomForestClassifier(n_estimators=COMPACT_TREES, max_depth=COMPACT_MAX_DEPTH,
+                                   max_leaf_nodes=COMPACT_MAX_LEAF_NODES, n_jobs=n_jobs,
+                                   random_state=random_state)
+    return model.fit(X, y)
+
+def distill_boosting(X, teacher_labels, random_state=42):
+    """Shallow gradient-boosted model fitted to a teacher model's predicted labels for X"""
+    model = HistGradientBoostingClassifier(max_iter=DISTILLED_ITERATIONS, max_depth=DISTILLED_MAX_DEPTH,
+                                           random_state=random_state)
+    return model.fit(X, teacher_labels)
+
+def pickled_size(model):
+    """Bytes of a model pickled with the highest protocol"""
+    return len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+
+class BudgetLookupTable:
+    """Budget probability looked up by a listing's city and cost bucket.
+
+    Buckets are (width * (b - 1), width * b], so per-city thresholds that are
+    multiples of width fall on bucket edges. Buckets without training rows
+    take the nearest cheaper bucket's value (or the nearest dearer one below
+    the cheapest), and cities not seen in training use the all-city table.
+    Listings with an unknown (NaN) cost are left out of the tables and get 0.
+    """
+    def __init__(self, cost_col, bucket_width):
+        self.cost_col = cost_col
+        self.bucket_width = bucket_width
+        self.tables = {}
+        self.default = np.zeros(1, dtype=np.float32)
+
+    def _buckets(self, costs):
+        costs = np.nan_to_num(np.asarray(costs, dtype=float), nan=0.0)
+        return np.ceil(costs / self.bucket_width).clip(min=0).astype(np.int64)
+
+    def _table(self, buckets, probabilities):
+        means = pd.Series(probabilities).groupby(buckets).mean()
+        table = means.reindex(np.arange(means.index.max() + 1)).ffill().bfill()
+        return table.to_numpy(dtype=np.float32)
+
+    def fit(self, cities, costs, probabilities):
+        """Average probabilities (e.g. a model's predict_proba) per city and cost bucket"""
+        known = ~np.isnan(np.asarray(costs, dtype=float))
+        cities = np.asarray(cities, dtype=object)[known]
+        buckets = self._buckets(costs)[known]
+        probabilities = np.asarray(probabilities, dtype=float)[known]
+        if len(buckets):
+            self.default = self._table(buckets, probabilities)
+        for city in pd.unique(cities):
+            mask = cities == city
+            self.tables[city] = self._table(buckets[mask], probabilities[mask])
+        return self
+
+    def budget_probability(self, df):
+        """Probability that each row of df is budget friendly, from its detected_city and cost"""
+        buckets = self._buckets(df[self.cost_col])
+        cities = df['detected_city'].to_numpy(dtype=object)
+        probabilities = np.empty(len(df), dtype=np.float32)
+        for city in pd.unique(cities):
+            mask = cities == city
+            table = self.tables.get(city, self.default)
+            # Costs beyond the dearest training bucket take its value
+            probabilities[mask] = table[np.minimum(buckets[mask], len(table) - 1)]
+        probabilities[np.isnan(np.asarray(df[self.cost_col], dtype=float))] = 0
+        return probabilities
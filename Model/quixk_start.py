@@ -16,8 +16,7 @@ def quick_demo():
     # Initialize system
     print("Loading system...")
     system = MultiCityRecommendationSystem()
-    system.load_and_preprocess_data()
-    system.train_models()
+    system.load_or_train()
     print("System ready!\n")
     
     # Demo queries showing different capabilities
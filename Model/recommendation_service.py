@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+"""
+Recommendation Service
+======================
+Shared, read-only MultiCityRecommendationSystem for the web entry points
+(viamigo-backend/app.py for WSGI, viamigo-backend/asgi.py for ASGI).
+
+Each process warms the system once in the background from the snapshot,
+micro-batches plain text queries through get_recommendations_batch, and
+reports readiness only after the models are loaded. When the source CSVs
+change, a new generation is built in the background and swapped in without
+dropping requests.
+"""
+
+import os
+import time
+import queue
+import asyncio
+import threading
+import contextlib
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from budget_recommendation_system import (
+    MultiCityRecommendationSystem, DEFAULT_SNAPSHOT_PATH, DEFAULT_SEARCH_RADIUS_KM, register_after_fork
+)
+
+try:
+    import fcntl
+except ImportError:  # Windows: workers simply don't coordinate the first build
+    fcntl = None
+
+MODEL_DIR = os.path.dirname(os.path.abspath(__file__))
+MAX_RECOMMENDATIONS = 50
+DEFAULT_RELOAD_INTERVAL = 60.0  # Seconds between checks of the source CSVs; None disables reloads
+DEFAULT_MAX_GENERATIONS = 2  # Current generation plus one to roll back to
+DEFAULT_REQUEST_TIMEOUT = 30.0  # Seconds recommend() waits for a batched result
+
+class Generation:
+    """One built recommender and the number of requests currently using it"""
+
+    def __init__(self, number, system):
+        self.number = number
+        self.system = system
+        self.created_at = time.time()
+        self.readers = 0
+        self.retired = False
+
+class GenerationManager:
+    """Hot-swappable generations of a recommender.
+
+    build() calls factory for a loaded, indexed and trained system and makes
+    it current with one reference swap. Requests hold a generation through
+    acquire(), so in-flight ones finish on the system they started with. The
+    newest max_generations stay alive for rollback(); an older generation
+    drops its system as soon as its last reader is done, so memory is reclaimed.
+    """
+
+    def __init__(self, factory, max_generations=DEFAULT_MAX_GENERATIONS):
+        self.factory = factory
+        self.max_generations = max(1, max_generations)
+        self.current = None
+        self._generations = []  # Retained generations, oldest first
+        self._count = 0
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._build_thread = None
+        register_after_fork(self)
+
+    def _after_fork(self):
+        """Reset build and reader state in a forked child.
+
+        A build or request running in the parent at the fork has no thread in
+        the child, so its locks would stay held (blocking every later build)
+        and its reader counts would never drop.
+        """
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._build_thread = None
+        for generation in self._generations:
+            generation.readers = 0
+            if generation.retired:
+                generation.system = None
+
+    @contextlib.contextmanager
+    def acquire(self):
+        """The current generation's system, kept alive until the block exits"""
+        with self._lock:
+            generation = self.current
+            if generation is None:
+                raise RuntimeError("No recommender generation has been built yet")
+            generation.readers += 1
+        try:
+            yield generation.system
+        finally:
+            with self._lock:
+                generation.readers -= 1
+                if generation.retired and generation.readers == 0:
+                    generation.system = None
+
+    def build(self):
+        """Build a generation and swap it in; returns it. Builds run one at a time."""
+        with self._build_lock:
+            system = self.factory()
+            with self._lock:
+                self._count += 1
+                generation = Generation(self._count, system)
+                self._generations.append(generation)
+                self.current = generation
+                while len(self._generations) > self.max_generations:
+                    self._retire(self._generations.pop(0))
+            print(f"Recommender generation {generation.number} is live")
+            return generation
+
+    def build_in_background(self, on_error=None):
+        """Start build() on a daemon thread; returns False if a build is already running.
+
+        A failed build leaves the current generation serving and is passed to on_error.
+        """
+        with self._lock:
+            if self._build_thread is not None and self._build_thread.is_alive():
+                return False
+
+            def build():
+                try:
+                    self.build()
+                except Exception as e:
+                    print(f"Error building recommender generation: {e}")
+                    if on_error is not None:
+                        on_error(e)
+
+            self._build_thread = threading.Thread(target=build, name='recommender-build', daemon=True)
+            self._build_thread.start()
+            return True
+
+    def rollback(self):
+        """Make the previous retained generation current, retiring the newer ones.
+
+        Returns the generation now serving, or None when there is nothing to roll back to.
+        """
+        with self._lock:
+            if self.current is None:
+                return None
+            position = self._generations.index(self.current)
+            if position == 0:
+                return None
+            for generation in self._generations[position:]:
+                self._retire(generation)
+            self._generations = self._generations[:position]
+            self.current = self._generations[-1]
+            print(f"Rolled back to recommender generation {self.current.number}")
+            return self.current
+
+    def _retire(self, generation):
+        """Stop retaining a generation; its system is released once no request holds it"""
+        generation.retired = True
+        if generation.readers == 0:
+            generation.system = None
+
+    def stats(self):
+        """Number, age, readers and state of each generation still alive"""
+        with self._lock:
+            return [{'generation': generation.number,
+                     'age_seconds': round(time.time() - generation.created_at, 1),
+                     'readers': generation.readers,
+                     'current': generation is self.current}
+                    for generation in self._generations]
+
+class RecommendationService:
+    """One warm recommender per process, shared by all request threads"""
+
+    def __init__(self, data_dir=MODEL_DIR, snapshot_path=None, max_batch_size=64,
+                 batch_wait=0.005, max_workers=4, reload_interval=DEFAULT_RELOAD_INTERVAL,
+                 max_generations=DEFAULT_MAX_GENERATIONS, request_timeout=DEFAULT_REQUEST_TIMEOUT):
+        self.data_dir = data_dir
+        self.snapshot_path = snapshot_path or os.path.join(data_dir, DEFAULT_SNAPSHOT_PATH)
+        self.max_batch_size = max_batch_size
+        self.batch_wait = batch_wait
+        self.max_workers = max_workers
+        self.reload_interval = reload_interval
+        self.request_timeout = request_timeout
+        self.generations = GenerationManager(self._build_system, max_generations)
+        self._source_state = None
+
+        self.ready = threading.Event()
+        self.error = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+        register_after_fork(self)
+
+    def _after_fork(self):
+        """Replace the locks a thread of the parent may have held at the fork"""
+        self._start_lock = threading.Lock()
+        ready, self.ready = self.ready, threading.Event()
+        if ready.is_set():
+            self.ready.set()
+
+    def start(self):
+        """Start warm-up and batching threads for this process.
+
+        Threads do not survive fork, so this runs again lazily in each
+        worker forked from a preloading master; a system already warmed
+        before the fork is reused as is, and a warm-up still running in
+        the master at the fork starts over in the worker.
+        """
+        if self._pid == os.getpid():
+            return
+
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._queue = queue.Queue()
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+
+            if not self.ready.is_set():
+                threading.Thread(target=self._warm_up, name='recommender-warm-up', daemon=True).start()
+            threading.Thread(target=self._run_batches, name='recommender-batcher', daemon=True).start()
+            if self.reload_interval:
+                threading.Thread(target=self._watch_sources, name='recommender-watcher', daemon=True).start()
+
+    @property
+    def system(self):
+        """The recommender currently serving, or None before warm-up"""
+        generation = self.generations.current
+        return generation.system if generation is not None else None
+
+    def is_ready(self):
+        """True once the catalogues and models are loaded"""
+        self.start()
+        return self.ready.is_set()
+
+    def _warm_up(self):
+        """Build the first generation"""
+        try:
+            self.generations.build()
+            self.ready.set()
+        except Exception as e:
+            self.error = e
+            print(f"Error warming up recommender: {e}")
+
+    def _build_system(self):
+        """A new system from the snapshot, rebuilt while holding a lock other workers wait on"""
+        system = MultiCityRecommendationSystem(data_dir=self.data_dir)
+        # Taken first, so a CSV replaced mid-build is picked up by the next check
+        source_state = self._read_source_state(system.data_paths)
+        if fcntl is None:
+            system.load_or_train(self.snapshot_path)
+        else:
+            with open(f"{self.snapshot_path}.lock", 'w') as lock_file:
+                # The first worker trains and saves; the rest then load its snapshot
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    system.load_or_train(self.snapshot_path)
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+        self._source_state = source_state
+        return system
+
+    @staticmethod
+    def _read_source_state(data_paths):
+        """Size and modification time of each source CSV (None if missing)"""
+        state = {}
+        for kind, path in data_paths.items():
+            try:
+                stat = os.stat(path)
+                state[kind] = (stat.st_size, stat.st_mtime_ns)
+            except OSError:
+                state[kind] = None
+        return state
+
+    def _watch_sources(self):
+        """Reload whenever a source CSV changes on disk"""
+        while True:
+            time.sleep(self.reload_interval)
+            system = self.system
+            if system is not None and self._read_source_state(system.data_paths) != self._source_state:
+                if self.reload():
+                    print("Source data changed, building a new recommender generation")
+
+    def reload(self, wait=False):
+        """Build a new generation from the current data and swap it in.
+
+        Requests keep being served by the current generation meanwhile. With
+        wait, blocks and returns the new generation (raising if the build
+        fails); otherwise returns whether a background build was started.
+        """
+        if wait:
+            return self.generations.build()
+        return self.generations.build_in_background(on_error=self._record_error)
+
+    def rollback(self):
+        """Serve the previous generation again; returns it, or None if there is none"""
+        return self.generations.rollback()
+
+    def _record_error(self, error):
+        """Keep a failed background build's error for the health check"""
+        self.error = error
+
+    def submit(self, query, num_recommendations=10):
+        """Queue a text query for the next batch; returns a Future of the result tuple"""
+        self.start()
+        future = Future()
+        self._queue.put((query, num_recommendations, future))
+        return future
+
+    def _run_batches(self):
+        """Drain the queue in small batches through get_recommendations_batch.
+
+        An error fails only the requests of its own batch; the thread keeps serving.
+        """
+        self.ready.wait()
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.batch_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+
+            try:
+                self._serve_batch(batch)
+            except Exception as e:
+                print(f"Error serving recommendation batch: {e}")
+
+    def _serve_batch(self, batch):
+        """Rank one drained batch and complete its futures"""
+        # The batch API takes one result size, so group by it. Requests cancelled
+        # while queued (e.g. a disconnected ASGI client) are dropped here.
+        by_size = {}
+        for query, num_recommendations, future in batch:
+            if future.set_running_or_notify_cancel():
+                by_size.setdefault(num_recommendations, []).append((query, future))
+
+        for num_recommendations, items in by_size.items():
+            try:
+                with self.generations.acquire() as system:
+                    results = system.get_recommendations_batch([query for query, _ in items], num_recommendations)
+            except Exception as e:
+                for _, future in items:
+                    self._complete(future, exception=e)
+                continue
+            for (_, future), result in zip(items, results):
+                self._complete(future, result)
+
+    @staticmethod
+    def _complete(future, result=None, exception=None):
+        """Set a batched request's result or exception, unless its future is already done"""
+        try:
+            if exception is not None:
+                future.set_exception(exception)
+            else:
+                future.set_result(result)
+        except InvalidStateError:
+            pass
+
+    def recommend(self, query, num_recommendations=10, location=None, radius_km=DEFAULT_SEARCH_RADIUS_KM):
+        """Blocking recommendation call for WSGI request threads; waits at most request_timeout seconds"""
+        if location is not None:
+            # Location queries are not batched
+            return self._recommend_now(query, num_recommendations, location, radius_km)
+        future = self.submit(query, num_recommendations)
+        try:
+            return future.result(timeout=self.request_timeout)
+        except FutureTimeoutError:
+            future.cancel()  # Skipped by the batcher if it is still queued
+            raise TimeoutError(f"No recommendations within {self.request_timeout} seconds") from None
+
+    def _recommend_now(self, query, num_recommendations, location, radius_km):
+        """Unbatched get_recommendations on the current generation"""
+        with self.generations.acquire() as system:
+            return system.get_recommendations(query, num_recommendations, location, radius_km)
+
+    async def recommend_async(self, query, num_recommendations=10, location=None, radius_km=DEFAULT_SEARCH_RADIUS_KM):
+        """Recommendation call for ASGI handlers; scoring never runs on the event loop"""
+        if location is not None:
+            self.start()
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._executor, self._recommend_now, query, num_recommendations, location, radius_km
+            )
+        future = asyncio.wrap_future(self.submit(query, num_recommendations))
+        try:
+            # On timeout the request is cancelled, so the batcher skips it if still queued
+            return await asyncio.wait_for(future, self.request_timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"No recommendations within {self.request_timeout} seconds") from None
+
+def parse_request(payload):
+    """Validate an /api/itinerary JSON body into recommend() keyword arguments"""
+    if not isinstance(payload, dict):
+        raise ValueError("Request body must be a JSON object")
+
+    query = payload.get('query')
+    if not isinstance(query, str) or not query.strip():
+        raise ValueError("'query' must be a non-empty string")
+
+    num_recommendations = payload.get('num_recommendations', 10)
+    # JSON true/false arrive as bools, which are ints to isinstance
+    if (not isinstance(num_recommendations, int) or isinstance(num_recommendations, bool)
+            or not 1 <= num_recommendations <= MAX_RECOMMENDATIONS):
+        raise ValueError(f"'num_recommendations' must be an integer between 1 and {MAX_RECOMMENDATIONS}")
+
+    request = {'query': query, 'num_recommendations': num_recommendations}
+
+    location = payload.get('location')
+    if location is not None:
+        if not isinstance(location, (list, tuple)) or len(location) != 2:
+            raise ValueError("'location' must be [latitude, longitude]")
+        request['location'] = tuple(_parse_number(value, "'location' must be [latitude, longitude]")
+                                    for value in location)
+        request['radius_km'] = _parse_number(payload.get('radius_km', DEFAULT_SEARCH_RADIUS_KM),
+                                             "'radius_km' must be a number")
+
+    return request
+
+def _parse_number(value, message):
+    """value as a float; a ValueError with message for null, bools, lists, objects or non-numeric text"""
+    if isinstance(value, bool):
+        raise ValueError(message)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ValueError(message) from None
+
+def format_response(result):
+    """JSON body for a (recommendations, city, preferences) result"""
+    recommendations, city, preferences = result
+    return {'itinerary': recommendations, 'city': city, 'preferences': preferences}
+
+_service = None
+_service_lock = threading.Lock()
+
+def get_service():
+    """The process-wide RecommendationService, started on first use"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = RecommendationService()
+    _service.start()
+    return _service
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Semantic Index
+==============
+Dense embeddings of listing descriptions with an approximate nearest
+neighbour index, used as an optional candidate generator ahead of the
+keyword filters and scoring.
+
+Embeddings are LSA vectors (TF-IDF reduced with TruncatedSVD), computed once
+per distinct description. IVFIndex clusters them with k-means and, per
+query, scans only the nprobe closest clusters instead of every vector.
+"""
+
+import functools
+
+import numpy as np
+import pandas as pd
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.decomposition import TruncatedSVD
+from sklearn.preprocessing import normalize
+
+DEFAULT_DIMENSIONS = 64
+DEFAULT_NPROBE = 8
+MAX_TRAINING_VECTORS = 50_000  # k-means sample; centroids barely move beyond this
+
+class IVFIndex:
+    """Inverted-file index over L2-normalised vectors, searched by inner product.
+
+    Vectors are grouped by their nearest k-means centroid and stored contiguously
+    per list, so a search is one centroid scan plus one matrix-vector product
+    over the nprobe best lists.
+    """
+    def __init__(self, vectors, n_lists=None, nprobe=DEFAULT_NPROBE, seed=0):
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        self.size, self.dimensions = vectors.shape
+        self.n_lists = n_lists or max(1, int(np.sqrt(self.size)))
+        self.nprobe = nprobe
+
+        if self.n_lists > 1:
+            rng = np.random.default_rng(seed)
+            sample = vectors if self.size <= MAX_TRAINING_VECTORS else vectors[rng.choice(self.size, MAX_TRAINING_VECTORS, replace=False)]
+            kmeans = MiniBatchKMeans(n_clusters=self.n_lists, random_state=seed, n_init=3).fit(sample)
+            self.centroids = normalize(kmeans.cluster_centers_).astype(np.float32)
+            labels = np.argmax(vectors @ self.centroids.T, axis=1)
+        else:
+            self.centroids = np.zeros((1, self.dimensions), dtype=np.float32)
+            labels = np.zeros(self.size, dtype=np.int64)
+
+        # List l holds ids[bounds[l]:bounds[l + 1]] and the matching rows of self.vectors
+        self.ids = np.argsort(labels, kind='stable')
+        self.vectors = vectors[self.ids]
+        self.bounds = np.searchsorted(labels[self.ids], np.arange(self.n_lists + 1))
+
+    def search(self, query, k, nprobe=None):
+        """Ids and similarities of (approximately) the k vectors closest to query, best first"""
+        nprobe = min(nprobe or self.nprobe, self.n_lists)
+        if nprobe < self.n_lists:
+            lists = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+            spans = [np.arange(self.bounds[l], self.bounds[l + 1]) for l in lists]
+            positions = np.concatenate(spans)
+        else:
+            positions = np.arange(self.size)
+        return self._top_k(positions, self.vectors[positions] @ query, k)
+
+    def exact_search(self, query, k):
+        """Brute-force ids and similarities of the k closest vectors, best first"""
+        return self._top_k(np.arange(self.size), self.vectors @ query, k)
+
+    def _top_k(self, positions, similarities, k):
+        k = min(k, len(positions))
+        if k <= 0:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.float32)
+        top = np.argpartition(-similarities, k - 1)[:k]
+        top = top[np.argsort(-similarities[top], kind='stable')]
+        return self.ids[positions[top]], similarities[top]
+
+class EmbeddingIndex:
+    """LSA embeddings of one catalogue's listing descriptions behind an IVFIndex.
+
+    Every distinct description is embedded once; rows map to descriptions
+    through their factorized codes, so millions of listings sharing a few
+    thousand descriptions cost a few thousand vectors.
+    """
+    def __init__(self, vectorizer, texts, dimensions=DEFAULT_DIMENSIONS, nprobe=DEFAULT_NPROBE,
+                 seed=0, cache_size=1024):
+        self.codes, descriptions = pd.factorize(pd.Series(texts))
+        self.vectorizer = vectorizer
+        self.svd = None
+        self.ann = None
+
+        # Rows of description d are row_order[row_bounds[d]:row_bounds[d + 1]]
+        self.row_order = np.argsort(self.codes, kind='stable')
+        self.row_bounds = np.searchsorted(self.codes[self.row_order], np.arange(len(descriptions) + 1))
+        self.rows_near = functools.lru_cache(maxsize=cache_size)(self._rows_near)
+
+        try:
+            tfidf = vectorizer.fit_transform(pd.Series(descriptions, dtype=object).astype(str))
+        except ValueError:  # Empty vocabulary: nothing to embed
+            return
+
+        components = min(dimensions, tfidf.shape[1] - 1, tfidf.shape[0] - 1)
+        if components >= 2:
+            self.svd = TruncatedSVD(n_components=components, random_state=seed)
+            vectors = self.svd.fit_transform(tfidf)
+        else:
+            vectors = tfidf.toarray()
+        self.ann = IVFIndex(normalize(vectors), nprobe=nprobe, seed=seed)
+
+    def embed(self, text):
+        """Unit-length embedding of text, or None if it shares no terms with the catalogue"""
+        if self.ann is None:
+            return None
+        vector = self.vectorizer.transform([text])
+        vector = self.svd.transform(vector)[0] if self.svd is not None else vector.toarray()[0]
+        norm = np.linalg.norm(vector)
+        return (vector / norm).astype(np.float32) if norm > 0 else None
+
+    def _rows_near(self, terms, k):
+        """Sorted row ids of the listings whose descriptions are among the k nearest to the terms"""
+        query = self.embed(' '.join(terms))
+        if query is None:
+            return None
+        descriptions, _ = self.ann.search(query, k)
+        rows = [self.row_order[self.row_bounds[d]:self.row_bounds[d + 1]] for d in descriptions]
+        return np.sort(np.concatenate(rows)).astype(np.int64)
+
+def recall_at_k(index, queries, k, nprobe=None):
+    """Mean fraction of the exact top-k ids that IVFIndex.search also returns"""
+    recalls = []
+    for query in queries:
+        exact, _ = index.exact_search(query, k)
+        approximate, _ = index.search(query, k, nprobe)
+        recalls.append(len(np.intersect1d(exact, approximate)) / max(len(exact), 1))
+    return float(np.mean(recalls)) if recalls else 0.0
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Test loading the shipped Bangalore restaurant chain listing
+"""
+
+import os
+
+import pandas as pd
+
+from budget_recommendation_system import MODEL_DIR, MultiCityRecommendationSystem
+
+MG_ROAD = (12.9756, 77.6066)
+
+def load_chain_listing():
+    """System with the chain listing as its restaurant feed, read straight from the CSV"""
+    system = MultiCityRecommendationSystem(data_paths={'restaurant': 'Bangalore restaurant chain.csv'},
+                                           catalogue_cache=False)
+    system.load_and_preprocess_data()
+    return system
+
+def test_chain_listing_columns():
+    """The export's headers are mapped onto the feed columns and its costs stay unknown"""
+    system = load_chain_listing()
+    raw = pd.read_csv(system.data_paths['restaurant'], dtype=str)
+    df = system.restaurant_data
+
+    assert len(df) == len(raw)
+    assert df['name'].iloc[0] == raw['Name'].iloc[0]
+    assert df['cuisines'].iloc[0] == raw['Category'].iloc[0]
+    assert df['rest_type'].iloc[0] == raw['Sub_Category'].iloc[0]
+    assert df['votes'].iloc[0] == float(raw['Review_count'].iloc[0])
+    assert df['numeric_rate'].iloc[0] == float(raw['Rating'].iloc[0])
+    assert df['numeric_cost'].isna().all()
+    assert (df['is_budget_friendly'] == 0).all()
+
+def test_chain_listing_radius_query():
+    """Location queries on the chain listing return restaurants inside the radius, nearest first"""
+    system = load_chain_listing()
+    assert system.restaurant_spatial_index is not None
+
+    recommendations, _, _ = system.get_recommendations('restaurants', num_recommendations=5,
+                                                       location=MG_ROAD, radius_km=2)
+    assert recommendations
+    for rec in recommendations:
+        assert rec['type'] == 'Restaurant'
+        assert float(rec['distance'].split()[0]) <= 2
+        assert rec['cost'] == 'Not listed'
+
+    nearest = system.nearest_restaurants(*MG_ROAD, k=5)
+    distances = [float(rec['distance'].split()[0]) for rec in nearest]
+    assert len(nearest) == 5
+    assert distances == sorted(distances)
+
+def test_chain_listing_cuisine_query():
+    """Lexicon cuisines match the export's longer categories ('South Indian Breakfast')"""
+    system = load_chain_listing()
+    for query in ('south indian food', 'idli and dosa breakfast'):
+        recommendations, _, _ = system.get_recommendations(query, num_recommendations=5,
+                                                           location=MG_ROAD, radius_km=3)
+        assert recommendations
+        assert all('south indian' in rec['cuisine'].lower() for rec in recommendations)
+
+def test_default_system_serves_chain_listing():
+    """Without zomato.csv the default system loads the chain listing and answers location queries"""
+    system = MultiCityRecommendationSystem(catalogue_cache=False)
+    if not os.path.exists(os.path.join(MODEL_DIR, 'zomato.csv')):
+        assert system.data_paths['restaurant'] == os.path.join(MODEL_DIR, 'Bangalore restaurant chain.csv')
+    system.load_and_preprocess_data()
+    system.train_models()
+
+    recommendations, _, _ = system.get_recommendations('food and stay', num_recommendations=6,
+                                                       location=MG_ROAD, radius_km=3)
+    assert any(rec['type'] == 'Restaurant' for rec in recommendations)
+
+def test_chain_listing_embeddings():
+    """The semantic index embeds the export's Category and Sub_Category"""
+    system = MultiCityRecommendationSystem(data_paths={'restaurant': 'Bangalore restaurant chain.csv'},
+                                           catalogue_cache=False, semantic_k=3)
+    system.load_and_preprocess_data()
+
+    rows = system.restaurant_embedding_index.rows_near(('dessert',), 3)
+    sub_categories = system.restaurant_data['rest_type'].iloc[rows].astype(str).str.strip().str.lower()
+    assert len(rows) > 0
+    assert (sub_categories == 'dessert').all()
+
+if __name__ == "__main__":
+    test_chain_listing_columns()
+    test_chain_listing_radius_query()
+    test_chain_listing_cuisine_query()
+    test_default_system_serves_chain_listing()
+    test_chain_listing_embeddings()
+    print("Chain listing tests passed!")
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Test cuisine matching on the packed cuisine bitset
+"""
+
+import pandas as pd
+
+from budget_recommendation_system import CatalogueIndex, CuisineBitset
+
+CUISINES = pd.Series(['South Indian Breakfast', 'North Indian, Chinese', 'Kebab, Biryani',
+                      'Chinese', 'Steak, Italian', None, 'South Indian, Chinese, Desserts'])
+
+def rows(mask):
+    return mask.nonzero()[0].tolist()
+
+def test_any_of_and_all_of():
+    """Queries match any of the cuisines by default, and every one with match_all"""
+    bitset = CuisineBitset(CUISINES)
+    assert rows(bitset.matches(['chinese', 'biryani'])) == [1, 2, 3, 6]
+    assert rows(bitset.matches(['chinese', 'south indian'], match_all=True)) == [6]
+    assert rows(bitset.matches(['chinese', 'thai'])) == [1, 3, 6]
+    assert rows(bitset.matches(['chinese', 'thai'], match_all=True)) == []
+
+def test_phrases_match_whole_words_inside_tokens():
+    """A phrase matches the tokens holding its words in order, never part of a word"""
+    bitset = CuisineBitset(CUISINES, phrases=['south indian'])
+    assert rows(bitset.matches(['south indian'])) == [0, 6]
+    assert rows(bitset.matches(['indian'])) == [0, 1, 6]
+    assert rows(bitset.matches(['indian south'])) == []
+    assert rows(bitset.matches(['tea'])) == []
+
+def test_plurals():
+    """A plural 's'/'es' on either side still matches, as in the query parser"""
+    bitset = CuisineBitset(CUISINES)
+    assert rows(bitset.matches(['kebabs'])) == [2]
+    assert rows(bitset.matches(['dessert'])) == [6]
+
+def test_counts_each_phrase_once():
+    """Specialty counts add one per phrase served, however many tokens it matches"""
+    bitset = CuisineBitset(CUISINES)
+    assert bitset.counts(['indian', 'chinese', 'kebabs']).tolist() == [1, 2, 1, 1, 0, 0, 2]
+
+def test_catalogue_index_candidates():
+    """CatalogueIndex filters on the lexicon's multi-word cuisines"""
+    df = pd.DataFrame({'name': [f'place {i}' for i in range(len(CUISINES))], 'cuisines': CUISINES,
+                       'detected_city': 'bangalore', 'is_budget_friendly': 1, 'numeric_rate': 4.0})
+    index = CatalogueIndex(df, 'numeric_rate', cuisine_col='cuisines')
+    assert index.candidates(cuisines=['south indian']).tolist() == [0, 6]
+    assert index.candidates(cuisines=['south indian', 'chinese'], match_all_cuisines=True).tolist() == [6]
+
+if __name__ == "__main__":
+    test_any_of_and_all_of()
+    test_phrases_match_whole_words_inside_tokens()
+    test_plurals()
+    test_counts_each_phrase_once()
+    test_catalogue_index_candidates()
+    print("Cuisine bitset tests passed!")
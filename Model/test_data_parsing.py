@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Test the vectorized parsers and city detection against the original per-row helpers
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+from budget_recommendation_system import MultiCityRecommendationSystem
+from data_parsing import parse_cost, parse_rating
+
+RATINGS = ['4.1/5', '3.9 /5', '4/5', '(2303 Ratings)', '8.4', '10', '7.5/10', 'NEW', '-', '',
+           ' 4.5 ', 'nan', None, np.nan, '0', '4.', '.5', 'Rated 3.2 by 120 people']
+COSTS = ['1,200', '300', ' 800 ', '₹1,500', 'Rs. 2,000 + taxes', '1,00,000', '', 'nan', None, np.nan,
+         'free', '0', '12.50', '₹ 999']
+
+def old_extract_rating(rating_str):
+    """The original MultiCityRecommendationSystem._extract_rating"""
+    if pd.isna(rating_str) or rating_str == 'nan':
+        return 3.0
+
+    rating_str = str(rating_str).strip()
+    match = re.search(r'(\d+\.?\d*)', rating_str)
+    if match:
+        rating = float(match.group(1))
+        if rating > 5:
+            rating = rating / 2
+        return min(max(rating, 0), 5)
+    return 3.0
+
+def old_extract_cost(cost_str):
+    """The original MultiCityRecommendationSystem._extract_cost"""
+    if pd.isna(cost_str) or cost_str == 'nan':
+        return 0
+
+    cost_str = str(cost_str).strip().replace(',', '')
+    match = re.search(r'(\d+)', cost_str)
+    if match:
+        return int(match.group(1))
+    return 0
+
+def old_detect_restaurant_city(system, row):
+    """The original per-row MultiCityRecommendationSystem._detect_restaurant_city"""
+    location = str(row.get('location', '')).lower()
+    address = str(row.get('address', '')).lower()
+    city_listed = str(row.get('listed_in(city)', '')).lower()
+    combined_text = f"{location} {address} {city_listed}"
+
+    for city in system.city_data.keys():
+        if city in combined_text:
+            return city
+        for area in system.city_data[city]['popular_areas']:
+            if area in combined_text:
+                return city
+    return 'bangalore'
+
+def test_parse_rating_matches_original():
+    """parse_rating gives the original helper's rating for every cell"""
+    series = pd.Series(RATINGS, dtype=object)
+    expected = [old_extract_rating(value) for value in RATINGS]
+    assert parse_rating(series).tolist() == expected
+
+def test_parse_cost_matches_original():
+    """parse_cost gives the original helper's cost for every cell"""
+    series = pd.Series(COSTS, dtype=object)
+    expected = [old_extract_cost(value) for value in COSTS]
+    assert parse_cost(series).tolist() == expected
+
+def test_city_detection_and_budget_labels_match_original():
+    """Vectorized city detection and budget labels match the original row-by-row results"""
+    system = MultiCityRecommendationSystem()
+    df = pd.DataFrame({
+        'location': ['Koramangala', 'Andheri West', np.nan, 'Connaught Place', 'T Nagar', 'Banjara Hills',
+                     'Koregaon Park', '', 'Somewhere', 'Indiranagar'],
+        'address': ['80 Feet Rd', 'Link Road, Mumbai', 'MG Road, Pune', np.nan, 'Chennai 600017', '',
+                    'Delhi Darbar Lane', 'Bandra, Mumbai', 'nan', 'HAL 2nd Stage, Hyderabad'],
+        'listed_in(city)': ['Koramangala 5th Block', np.nan, '', 'Delhi', 'T Nagar', 'Hyderabad',
+                            'Pune', 'Bandra', np.nan, 'Indiranagar'],
+        'numeric_cost': [300, 800, 450, 1200, 400, 500, 350, 900, 0, 650]
+    })
+
+    expected = [old_detect_restaurant_city(system, row) for _, row in df.iterrows()]
+    detected = system._detect_restaurant_city(df)
+    assert detected.tolist() == expected
+
+    df['detected_city'] = detected
+    thresholds = [system.city_data[city]['budget_threshold_restaurant'] for city in expected]
+    expected_labels = [1 if cost <= threshold else 0 for cost, threshold in zip(df['numeric_cost'], thresholds)]
+    assert system._classify_restaurant_budget(df).tolist() == expected_labels
+
+if __name__ == "__main__":
+    test_parse_rating_matches_original()
+    test_parse_cost_matches_original()
+    test_city_detection_and_budget_labels_match_original()
+    print("Parsing tests passed!")
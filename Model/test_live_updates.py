@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test live catalogue updates while queries are being answered
+"""
+
+import tempfile
+import threading
+
+import pandas as pd
+import pytest
+
+from benchmark import build_system
+from budget_recommendation_system import Catalogue
+
+QUERIES = ['cheap biryani in bangalore', 'south indian food', 'budget hotels in mumbai',
+           'best rated restaurants in delhi', 'pizza and burgers']
+
+def test_catalogue_is_immutable():
+    """Catalogues change only by building a new one with replace()"""
+    catalogue = Catalogue(data=None)
+    with pytest.raises(AttributeError):
+        catalogue.model = object()
+    assert catalogue.replace(model='m').model == 'm'
+    assert catalogue.model is None
+
+def test_queries_during_updates():
+    """Readers never fail while listings are removed, re-added and the models retrained"""
+    with tempfile.TemporaryDirectory() as data_dir:
+        system = build_system(data_dir, 1)
+        system.retrain_fraction = 0.01  # Retrain in the background while readers run
+        raw = pd.read_csv(system.data_paths['restaurant'], dtype=str).loc[system.restaurant_data.index[:20]]
+
+        errors = []
+        done = threading.Event()
+
+        def read():
+            while not done.is_set():
+                try:
+                    for query in QUERIES:
+                        system.get_recommendations(query, num_recommendations=6)
+                    system.get_recommendations_batch(QUERIES, num_recommendations=6)
+                except Exception as e:
+                    errors.append(e)
+                    return
+
+        readers = [threading.Thread(target=read) for _ in range(3)]
+        for reader in readers:
+            reader.start()
+        try:
+            for _ in range(10):
+                system.remove_listings('restaurant', raw.index)
+                system.upsert_listings('restaurant', raw)
+            system.train_models()
+        finally:
+            done.set()
+            for reader in readers:
+                reader.join()
+            if system._retrain_thread is not None:
+                system._retrain_thread.join()
+
+        assert not errors, errors
+        assert raw.index.isin(system.restaurant_data.index).all()
+        assert system.restaurant_data['budget_probability'].notna().all()
+
+def test_upserted_rows_clean_like_feed_rows():
+    """Missing cells of upserted rows stay missing, as when the feed is loaded"""
+    with tempfile.TemporaryDirectory() as data_dir:
+        system = build_system(data_dir, 1, train=False)
+        raw = pd.read_csv(system.data_paths['restaurant'], dtype=str).loc[system.restaurant_data.index[:3]]
+        loaded = system.restaurant_data.loc[raw.index]
+
+        raw['rest_type'] = None
+        system.upsert_listings('restaurant', raw)
+        upserted = system.restaurant_data.loc[raw.index]
+        assert (upserted['rest_type'] == '').all()
+        assert not upserted['combined_features'].str.contains(r'\bnan\b').any()
+        assert upserted['location'].tolist() == loaded['location'].tolist()
+
+if __name__ == "__main__":
+    test_catalogue_is_immutable()
+    test_queries_during_updates()
+    test_upserted_rows_clean_like_feed_rows()
+    print("Live update tests passed!")
@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+"""
+Test compacting the budget models
+"""
+
+import tempfile
+
+from benchmark import build_system
+from model_compaction import BudgetLookupTable
+
+def test_boosting_after_lookup():
+    """A lookup table can itself be distilled into a boosted model"""
+    with tempfile.TemporaryDirectory() as data_dir:
+        system = build_system(data_dir, 1)
+        system.compact_models('lookup', tolerance=1.0)
+        assert isinstance(system.restaurant_model, BudgetLookupTable)
+
+        report = system.compact_models('boosting', tolerance=1.0)
+        assert report['models']['restaurant']['kept']
+        assert not isinstance(system.restaurant_model, BudgetLookupTable)
+        assert system.restaurant_data['budget_probability'].between(0, 1).all()
+
+if __name__ == "__main__":
+    test_boosting_after_lookup()
+    print("Compaction tests passed!")
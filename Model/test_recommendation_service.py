@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Test the recommendation service's micro-batching thread
+"""
+
+import os
+import time
+import asyncio
+import threading
+
+import pytest
+
+from recommendation_service import GenerationManager, RecommendationService, parse_request
+
+class GatedSystem:
+    """Stand-in recommender whose batches wait for a gate and fail on the query 'boom'"""
+
+    def __init__(self):
+        self.started = threading.Event()
+        self.gate = threading.Event()
+        self.queries = []
+
+    def get_recommendations_batch(self, queries, num_recommendations=10):
+        self.started.set()
+        self.gate.wait()
+        self.queries.extend(queries)
+        if 'boom' in queries:
+            raise RuntimeError('boom')
+        return [([query], 'bangalore', {}) for query in queries]
+
+def gated_service(request_timeout=5.0):
+    """Started service serving one GatedSystem generation"""
+    system = GatedSystem()
+    service = RecommendationService(reload_interval=None, request_timeout=request_timeout)
+    service.generations = GenerationManager(lambda: system)
+    service.generations.build()
+    service.ready.set()
+    service.start()
+    return service, system
+
+def test_cancelled_request_keeps_batcher_alive():
+    """A request cancelled while queued is skipped and later queries are still answered"""
+    service, system = gated_service()
+    first = service.submit('first')  # Holds the batcher until the gate opens
+    assert system.started.wait(5)
+
+    async def cancel_one():
+        task = asyncio.ensure_future(service.recommend_async('cancelled'))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_one())
+    system.gate.set()
+
+    assert first.result(timeout=5)[0] == ['first']
+    assert service.recommend('after')[0] == ['after']
+    assert 'cancelled' not in system.queries
+
+def test_failed_batch_keeps_batcher_alive():
+    """A batch that raises fails its own requests only"""
+    service, system = gated_service()
+    system.gate.set()
+
+    with pytest.raises(RuntimeError):
+        service.recommend('boom')
+    assert service.recommend('after')[0] == ['after']
+
+def test_recommend_wait_is_bounded():
+    """recommend() gives up after request_timeout instead of blocking forever"""
+    service, system = gated_service(request_timeout=0.2)
+
+    with pytest.raises(TimeoutError):
+        service.recommend('stuck')
+    system.gate.set()
+    assert service.recommend('after')[0] == ['after']
+
+def test_recommend_async_wait_is_bounded():
+    """recommend_async() gives up after request_timeout too"""
+    service, system = gated_service(request_timeout=0.2)
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(service.recommend_async('stuck'))
+    system.gate.set()
+    assert asyncio.run(service.recommend_async('after'))[0] == ['after']
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason="needs os.fork")
+def test_fork_during_warm_up():
+    """A worker forked while the master is still warming up warms up itself"""
+    building = threading.Event()
+
+    def slow_factory():
+        building.set()
+        time.sleep(0.5)
+        return GatedSystem()
+
+    service = RecommendationService(reload_interval=None)
+    service.generations = GenerationManager(slow_factory)
+    service.start()
+    assert building.wait(5)
+
+    pid = os.fork()
+    if pid == 0:
+        ready = False
+        try:
+            deadline = time.monotonic() + 10
+            while not ready and time.monotonic() < deadline:
+                ready = service.is_ready()
+                time.sleep(0.05)
+        finally:
+            os._exit(0 if ready else 1)
+
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+    assert service.ready.wait(5)
+
+@pytest.mark.parametrize('payload', [
+    {'query': 'food', 'num_recommendations': True},
+    {'query': 'food', 'location': [12.9, 77.6], 'radius_km': None},
+    {'query': 'food', 'location': [12.9, 77.6], 'radius_km': [2]},
+    {'query': 'food', 'location': [12.9, 77.6], 'radius_km': {'km': 2}},
+    {'query': 'food', 'location': [None, 77.6]},
+    {'query': 'food', 'location': [{}, 77.6]},
+    {'query': 'food', 'location': [True, 77.6]},
+    {'query': 'food', 'location': '12'},
+])
+def test_parse_request_rejects_bad_payloads(payload):
+    """Malformed fields raise ValueError, which the entry points answer with 400"""
+    with pytest.raises(ValueError):
+        parse_request(payload)
+
+def test_parse_request():
+    """Valid payloads become recommend() keyword arguments"""
+    assert parse_request({'query': 'food', 'location': ['12.9', 77.6], 'radius_km': '2.5'}) == {
+        'query': 'food', 'num_recommendations': 10, 'location': (12.9, 77.6), 'radius_km': 2.5}
+
+if __name__ == "__main__":
+    test_cancelled_request_keeps_batcher_alive()
+    test_failed_batch_keeps_batcher_alive()
+    test_recommend_wait_is_bounded()
+    test_recommend_async_wait_is_bounded()
+    test_fork_during_warm_up()
+    test_parse_request()
+    print("Recommendation service tests passed!")
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Test TF-IDF scoring in TextIndex
+"""
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+
+from budget_recommendation_system import TextIndex
+
+TEXTS = ['north indian koramangala casual dining', 'chinese indiranagar quick bites', None,
+         'south indian jayanagar quick bites', 'chinese indiranagar quick bites', 'cafe koramangala']
+
+def test_scores_match_cosine_similarity():
+    """Scores equal the cosine similarity of each row's description to the query; rows without one score 0"""
+    index = TextIndex(TfidfVectorizer(), TEXTS)
+    terms = ('chinese', 'koramangala')
+    query = index.vectorizer.transform([' '.join(terms)])
+    rows = index.vectorizer.transform([text or '' for text in TEXTS])
+    expected = cosine_similarity(rows, query).ravel()
+
+    np.testing.assert_allclose(index.scores(terms), expected)
+    np.testing.assert_allclose(index.scores(terms, np.array([5, 2, 1])), expected[[5, 2, 1]])
+    assert index.scores(('unknownterm',)).tolist() == [0.0] * len(TEXTS)
+
+def test_cache_holds_matches_only():
+    """A cached query keeps only the descriptions it matched"""
+    index = TextIndex(TfidfVectorizer(), TEXTS)
+    matched, similarity = index.similarity(('chinese',))
+    assert matched.tolist() == [1]
+    assert len(similarity) == 1
+
+if __name__ == "__main__":
+    test_scores_match_cosine_similarity()
+    test_cache_holds_matches_only()
+    print("Text index tests passed!")
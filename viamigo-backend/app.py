@@ -3,20 +3,34 @@ import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '../Model'))
 
-# Import your ML model function, replace with your actual function name
-from budget_recommendation_system import predict_itinerary  # Example
+from recommendation_service import get_service, parse_request, format_response
+
+# One shared, read-only recommender per process; it warms up in the background.
+# Run with e.g. `gunicorn -w 4 -k gthread --threads 8 app:app` - workers load the
+# snapshot instead of retraining, and request threads are micro-batched.
+service = get_service()
 
 app = Flask(__name__)
 
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    # Readiness only flips once the catalogues and models are loaded
+    if service.is_ready():
+        return jsonify({'status': 'ready'})
+    return jsonify({'status': 'error' if service.error else 'warming'}), 503
+
 @app.route('/api/itinerary', methods=['POST'])
 def get_itinerary():
-    data = request.json
+    if not service.is_ready():
+        return jsonify({'error': 'Recommender is warming up'}), 503
+    try:
+        params = parse_request(request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     try:
-        # Call your ML prediction function with the incoming data
-        itinerary = predict_itinerary(data)
-        return jsonify({'itinerary': itinerary})
+        return jsonify(format_response(service.recommend(**params)))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 if __name__ == "__main__":
-    app.run(host='0.0.0.0', port=5000)
+    app.run(host='0.0.0.0', port=5000, threaded=True)
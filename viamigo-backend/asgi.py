@@ -0,0 +1,65 @@
+"""ASGI entry point for the recommender: `uvicorn asgi:app --workers 4`"""
+import json
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '../Model'))
+
+from recommendation_service import get_service, parse_request, format_response
+
+async def _send_json(send, status, payload):
+    body = json.dumps(payload).encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())]
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+async def _read_body(receive):
+    body = b''
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if not message.get('more_body', False):
+            return body
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            # Warm-up runs in the background so the probe can report it
+            get_service()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await _lifespan(receive, send)
+    if scope['type'] != 'http':
+        return
+
+    service = get_service()
+    path, method = scope['path'], scope['method']
+
+    if path == '/healthz' and method == 'GET':
+        # Readiness only flips once the catalogues and models are loaded
+        if service.is_ready():
+            return await _send_json(send, 200, {'status': 'ready'})
+        return await _send_json(send, 503, {'status': 'error' if service.error else 'warming'})
+
+    if path == '/api/itinerary' and method == 'POST':
+        if not service.is_ready():
+            return await _send_json(send, 503, {'error': 'Recommender is warming up'})
+        try:
+            params = parse_request(json.loads(await _read_body(receive) or b'null'))
+        except ValueError as e:  # includes malformed JSON
+            return await _send_json(send, 400, {'error': str(e)})
+        try:
+            # Scoring runs on the batching thread or the executor, never on the event loop
+            return await _send_json(send, 200, format_response(await service.recommend_async(**params)))
+        except Exception as e:
+            return await _send_json(send, 500, {'error': str(e)})
+
+    return await _send_json(send, 404, {'error': 'Not found'})